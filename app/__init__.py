@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, jsonify
 from .config import Config
 from .db import db
 from .models import *
@@ -7,8 +7,11 @@ import logging
 from .routes import register_routes
 from .socketio import socketio  # ✅ Import global SocketIO
 from .services import start_scheduler  # ✅ Import Scheduler
+from .services.notification_partition_service import ensure_notification_partitions
+from .revocation import start_revocation_listener
+from .password_hashing import PasswordHashingBusy
 
-def create_app():
+def create_app(start_jobs=True):
     app = Flask(__name__)
     CORS(app)
 
@@ -24,15 +27,26 @@ def create_app():
     # ✅ Ensure tables are created
     with app.app_context():
         db.create_all()
+        ensure_notification_partitions()  # ✅ No-op unless notifications is partitioned
 
     # ✅ Register routes
     register_routes(app)
 
-    # ✅ Attach Socket.IO to Flask app
-    socketio.init_app(app)
+    # ✅ A login burst gets a quick 503 instead of queueing every request behind password hashing
+    @app.errorhandler(PasswordHashingBusy)
+    def password_hashing_busy(e):
+        db.session.rollback()
+        return jsonify({"message": "Too many sign-in attempts right now, please try again."}), 503, {"Retry-After": "2"}
 
-    # ✅ Start the scheduler
-    start_scheduler(app)
+    # ✅ Attach Socket.IO to Flask app (the message queue lets worker processes emit too)
+    socketio.init_app(app, message_queue=app.config.get("SOCKETIO_MESSAGE_QUEUE"))
+
+    # ✅ Keep the in-process token revocation filter in sync across processes
+    start_revocation_listener(app)
+
+    # ✅ Start the scheduler (skipped by standalone workers)
+    if start_jobs:
+        start_scheduler(app)
 
 
     return app
@@ -0,0 +1,74 @@
+import time
+import threading
+from datetime import datetime
+from sqlalchemy import update, values, column, Integer, DateTime, or_
+from .db import db
+from .models import User
+from .redis_config import redis_client
+
+# ✅ Sorted set of user id -> last authenticated request (epoch seconds), flushed to users.last_active
+LAST_SEEN_KEY = "users:last_seen"
+LAST_ACTIVE_FLUSH_BATCH_SIZE = 1000
+# ✅ Bound on the in-process dedupe table; it is simply cleared when full
+RECENTLY_SEEN_LIMIT = 100000
+
+# ✅ user id -> minute (epoch // 60) this process last wrote to Redis for them
+_recently_seen = {}
+_recently_seen_lock = threading.Lock()
+
+# Remove flushed members, unless they were seen again (higher score) since they were read
+_ACK_SCRIPT = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+    local score = redis.call('zscore', KEYS[1], ARGV[i])
+    if score and tonumber(score) <= tonumber(ARGV[i + 1]) then
+        removed = removed + redis.call('zrem', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+_ack = redis_client.register_script(_ACK_SCRIPT)
+
+def record_activity(user_id, now=None):
+    """Note that `user_id` made a request. At most one Redis write per user per minute per process."""
+    now = now or time.time()
+    minute = int(now // 60)
+    with _recently_seen_lock:
+        if _recently_seen.get(user_id) == minute:
+            return
+        if len(_recently_seen) >= RECENTLY_SEEN_LIMIT:
+            _recently_seen.clear()
+        _recently_seen[user_id] = minute
+    redis_client.zadd(LAST_SEEN_KEY, {user_id: now}, gt=True)
+
+def flush_last_active(batch_size=LAST_ACTIVE_FLUSH_BATCH_SIZE):
+    """Write pending last-seen times to users.last_active, one UPDATE ... FROM (VALUES ...) per batch.
+
+    A timestamp never moves last_active backwards, and entries are only removed
+    from Redis once their batch is committed. Returns users updated.
+    """
+    cutoff = time.time()
+    flushed = 0
+    while True:
+        seen = redis_client.zrangebyscore(LAST_SEEN_KEY, "-inf", cutoff, start=0, num=batch_size, withscores=True)
+        if not seen:
+            break
+
+        last_seen = values(
+            column("id", Integer), column("last_active", DateTime), name="last_seen"
+        ).data([(int(user_id), datetime.utcfromtimestamp(score)) for user_id, score in seen])
+        db.session.execute(
+            update(User).where(
+                User.id == last_seen.c.id,
+                or_(User.last_active.is_(None), User.last_active < last_seen.c.last_active)
+            ).values(last_active=last_seen.c.last_active),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.commit()
+
+        _ack(keys=[LAST_SEEN_KEY], args=[arg for user_id, score in seen for arg in (user_id, score)])
+        flushed += len(seen)
+        if len(seen) < batch_size:
+            break
+
+    return flushed
@@ -0,0 +1,62 @@
+"""Login-burst load test: password hashing inline vs in the hashing process pool.
+
+Run with `python -m app.benchmarks.login_burst [logins] [threads]`. Simulates
+one gunicorn worker with `threads` request threads receiving a burst of
+signins together with a steady trickle of cheap requests (5 ms of I/O) to
+other endpoints, and reports the latency of those other requests and the
+signin outcomes. Inline, every signin holds a request thread for a full
+hash; with the pool at most PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE
+signins wait on hashes and the rest are answered 503 straight away.
+"""
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from ..config import Config
+from .. import password_hashing
+
+PASSWORD = "correct horse battery staple"
+PROBE_INTERVAL_SECONDS = 0.01
+
+def _probe(submitted_at):
+    time.sleep(0.005)
+    return time.perf_counter() - submitted_at
+
+def _run(mode, logins, threads, stored_hash):
+    def signin():
+        if mode == "inline":
+            return "ok" if check_password_hash(stored_hash, PASSWORD) else "denied"
+        try:
+            matches, _ = password_hashing.verify_password(stored_hash, PASSWORD)
+            return "ok" if matches else "denied"
+        except password_hashing.PasswordHashingBusy:
+            return "503"
+
+    with ThreadPoolExecutor(max_workers=threads) as request_threads:
+        start = time.perf_counter()
+        signins = [request_threads.submit(signin) for _ in range(logins)]
+        probes = []
+        while not all(future.done() for future in signins):
+            probes.append(request_threads.submit(_probe, time.perf_counter()))
+            time.sleep(PROBE_INTERVAL_SECONDS)
+        elapsed = time.perf_counter() - start
+        latencies = sorted(future.result() * 1000 for future in probes)
+
+    outcomes = [future.result() for future in signins]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+    print(f"{mode:7}: burst took {elapsed:6.2f}s, signins ok={outcomes.count('ok')} 503={outcomes.count('503')}, "
+          f"{outcomes.count('ok') / elapsed:6.1f} ok/s | other requests: {len(latencies)}, "
+          f"p50 {statistics.median(latencies) if latencies else 0:7.1f} ms, p99 {p99:7.1f} ms")
+
+def main(logins=64, threads=16):
+    stored_hash = generate_password_hash(PASSWORD, Config.PASSWORD_HASH_METHOD or "scrypt")
+    print(f"method: {stored_hash.split('$')[0]}, request threads: {threads}, burst: {logins} signins, "
+          f"hash pool: {Config.PASSWORD_HASH_WORKERS} workers + {Config.PASSWORD_HASH_QUEUE_SIZE} queued")
+    password_hashing.verify_password(stored_hash, PASSWORD)  # Start the pool outside the measurement
+    _run("inline", logins, threads, stored_hash)
+    _run("pool", logins, threads, stored_hash)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 64, int(args[1]) if len(args) > 1 else 16)
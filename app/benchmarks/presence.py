@@ -0,0 +1,53 @@
+"""Compare per-user HEXISTS against batched presence lookups.
+
+Run with `python -m app.benchmarks.presence [users] [online_ratio]`. Uses
+fakeredis when it is installed, otherwise the local Redis from redis_config
+(the benchmark writes to a scratch hash and removes it afterwards).
+"""
+import sys
+import time
+from .. import presence
+
+def _client():
+    try:
+        import fakeredis
+        return fakeredis.FakeStrictRedis(decode_responses=True), "fakeredis"
+    except ImportError:
+        from ..redis_config import redis_client
+        return redis_client, "redis://localhost:6379/0"
+
+def main(users=100_000, online_ratio=0.1):
+    client, backend = _client()
+    key = presence.ACTIVE_USERS_KEY
+    original_key = key
+    presence.ACTIVE_USERS_KEY = key = "bench:active_users"
+
+    try:
+        client.delete(key)
+        step = max(1, int(1 / online_ratio))
+        pipe = client.pipeline(transaction=False)
+        for uid in range(0, users, step):
+            pipe.hset(key, str(uid), f"sid-{uid}")
+        pipe.execute()
+        user_ids = list(range(users))
+
+        start = time.perf_counter()
+        per_user = {uid for uid in user_ids if client.hexists(key, str(uid))}
+        per_user_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = presence.online_user_ids(user_ids, client=client)
+        batched_elapsed = time.perf_counter() - start
+
+        assert per_user == batched, "batched lookup disagrees with HEXISTS"
+        print(f"backend: {backend}, users: {users}, online: {len(batched)}")
+        print(f"per-user HEXISTS : {per_user_elapsed:.3f}s ({users} round trips)")
+        print(f"batched HMGET    : {batched_elapsed:.3f}s (1 round trip)")
+        print(f"speedup          : {per_user_elapsed / batched_elapsed:.1f}x")
+    finally:
+        client.delete(key)
+        presence.ACTIVE_USERS_KEY = original_key
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100_000, float(args[1]) if len(args) > 1 else 0.1)
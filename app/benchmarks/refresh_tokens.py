@@ -0,0 +1,54 @@
+"""Compare the cost of hashing refresh tokens with werkzeug against HMAC-SHA256 digests.
+
+Run with `python -m app.benchmarks.refresh_tokens [tokens] [stored_tokens]`.
+Times only the refresh-token hashing step of signin and refresh: the old
+scheme hashes the token with werkzeug's generate_password_hash and checks it
+with check_password_hash. The new scheme computes one HMAC and looks the
+digest up; a dict stands in for the unique index. Password checks, JWT
+signing and database round trips are left out. The figures are therefore
+hashing cost per token, not end-to-end signin throughput.
+"""
+import hashlib
+import hmac
+import secrets
+import sys
+import time
+from werkzeug.security import generate_password_hash, check_password_hash
+
+KEY = secrets.token_bytes(32)
+
+def _digest(token):
+    return hmac.new(KEY, token.encode(), hashlib.sha256).hexdigest()
+
+def _rate(count, elapsed):
+    return count / elapsed if elapsed else float("inf")
+
+def main(count=20, stored_tokens=100_000):
+    tokens = [secrets.token_urlsafe(128) for _ in range(count)]
+
+    start = time.perf_counter()
+    hashed = [generate_password_hash(token) for token in tokens]
+    old_store = time.perf_counter() - start
+    start = time.perf_counter()
+    assert all(check_password_hash(stored, token) for stored, token in zip(hashed, tokens))
+    old_check = time.perf_counter() - start
+
+    index = {_digest(secrets.token_urlsafe(128)): n for n in range(stored_tokens)}
+    start = time.perf_counter()
+    for token in tokens:
+        index[_digest(token)] = len(index)
+    new_store = time.perf_counter() - start
+    start = time.perf_counter()
+    assert all(_digest(token) in index for token in tokens)
+    new_check = time.perf_counter() - start
+
+    print(f"refresh-token hashing cost, tokens: {count}, digests in index: {len(index)}")
+    print(f"werkzeug hash  : {old_store / count * 1000:8.3f} ms/token -> {_rate(count, old_store):10.1f} tokens hashed/s per worker")
+    print(f"werkzeug check : {old_check / count * 1000:8.3f} ms/token -> {_rate(count, old_check):10.1f} tokens checked/s per worker")
+    print(f"HMAC hash      : {new_store / count * 1000:8.3f} ms/token -> {_rate(count, new_store):10.1f} tokens hashed/s per worker")
+    print(f"HMAC check     : {new_check / count * 1000:8.3f} ms/token -> {_rate(count, new_check):10.1f} tokens checked/s per worker")
+    print(f"speedup        : {old_store / new_store:.0f}x hash, {old_check / new_check:.0f}x check")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20, int(args[1]) if len(args) > 1 else 100_000)
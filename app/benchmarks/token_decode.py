@@ -0,0 +1,44 @@
+"""Compare verifying a JWT on every request against the verified-token cache.
+
+Run with `python -m app.benchmarks.token_decode [requests] [clients]`. Each of
+`clients` tokens is presented `requests / clients` times, as a mobile client
+re-sends the same access token for days. Measures both the compact tokens
+issued now and the old ones that embedded the whole profile.
+"""
+import secrets
+import sys
+import time
+import jwt
+from .. import token_cache
+
+SECRET = secrets.token_hex(32)
+
+def _tokens(clients, profile):
+    exp = int(time.time()) + 7 * 24 * 3600
+    tokens = []
+    for user_id in range(clients):
+        payload = {"user_id": user_id, "role": "user", "jti": secrets.token_hex(16), "exp": exp}
+        if profile:
+            payload["user"] = {"id": user_id, "user_name": "Anonymous User", "email": f"user{user_id}@example.com", "avatar": "https://example.com/" + "a" * 80, **{f"field_{n}": "x" * 20 for n in range(20)}}
+        tokens.append(jwt.encode(payload, SECRET, algorithm="HS256"))
+    return tokens
+
+def _measure(decode, tokens, requests):
+    start = time.perf_counter()
+    for n in range(requests):
+        decode(tokens[n % len(tokens)])
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+def main(requests=200_000, clients=1_000):
+    for label, profile in (("compact token", False), ("profile token", True)):
+        tokens = _tokens(clients, profile)
+        token_cache.clear_token_cache()
+        uncached = _measure(lambda token: jwt.decode(token, SECRET, algorithms=["HS256"]), tokens, requests)
+        cached = _measure(lambda token: token_cache.decode_token(token, SECRET), tokens, requests)
+        print(f"{label} ({len(tokens[0])} bytes), {requests} requests from {clients} clients")
+        print(f"  jwt.decode every request : {uncached:6.2f} µs/request")
+        print(f"  verified-token cache     : {cached:6.2f} µs/request ({uncached / cached:.1f}x)")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200_000, int(args[1]) if len(args) > 1 else 1_000)
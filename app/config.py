@@ -8,4 +8,31 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_SECRET_KEY= os.getenv("JWT_SECRET_KEY")
-    JWT_EXPIRATION_DELTA = 36000
\ No newline at end of file
+    JWT_EXPIRATION_DELTA = 36000
+    # ✅ Shared key for the /admin routes (sent as X-Admin-Key); unset keeps them closed
+    ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+    # ✅ gunicorn worker processes per host (read by gunicorn.conf.py too)
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", 4))
+    # ✅ Password hashing runs in a per-worker process pool.
+    # Method for new hashes: werkzeug's default unless set; setting it opts in to rehashing
+    # every other method on login, which costs a second hash per login until accounts move.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD")
+    # Pool size: the host's cores are shared between the web workers, so all pools together use
+    # each core once. Queue: signins allowed to wait for a hash; keep workers + queue below
+    # gunicorn's threads so a login burst leaves threads for other requests.
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 1) // WEB_WORKERS)))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", max(8, 4 * PASSWORD_HASH_WORKERS)))
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", 5))
+    # ✅ Key for the HMAC of stored refresh tokens (falls back to JWT_SECRET_KEY)
+    REFRESH_TOKEN_SECRET = os.getenv("REFRESH_TOKEN_SECRET")
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "redis://localhost:6379/0")
+
+    # ✅ Background jobs: worker threads for light jobs, for fan-outs / maintenance, and how late a run may start
+    SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", 4))
+    SCHEDULER_HEAVY_WORKERS = int(os.getenv("SCHEDULER_HEAVY_WORKERS", 1))
+    SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", 300))
+
+    # ✅ Campaigns are sent in each user's local time; users without one get this zone
+    DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "Asia/Kolkata")
+    # ✅ Upper bound on campaign notifications written per minute, across all campaigns
+    CAMPAIGN_RATE_PER_MINUTE = int(os.getenv("CAMPAIGN_RATE_PER_MINUTE", 20000))
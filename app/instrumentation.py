@@ -0,0 +1,52 @@
+import threading
+import time
+from contextlib import contextmanager
+import redis
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ✅ The collector of the job running on this thread, if any
+_local = threading.local()
+
+class JobCollector:
+    """Database time, statements and Redis round trips spent by one job run."""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_statements = 0
+        self.redis_round_trips = 0
+
+def current_collector():
+    return getattr(_local, "collector", None)
+
+@contextmanager
+def collect():
+    """Attribute every statement and Redis round trip on this thread to a new collector."""
+    previous = current_collector()
+    collector = JobCollector()
+    _local.collector = collector
+    try:
+        yield collector
+    finally:
+        _local.collector = previous
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_collector() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collector = current_collector()
+    if collector is not None and conn.info.get("query_start"):
+        collector.db_time += time.perf_counter() - conn.info["query_start"].pop()
+        collector.db_statements += 1
+
+class CountingConnection(redis.Connection):
+    """Redis connection that counts round trips (a pipeline is one) for the current job."""
+
+    def send_packed_command(self, command, check_health=True):
+        collector = current_collector()
+        if collector is not None:
+            collector.redis_round_trips += 1
+        return super().send_packed_command(command, check_health)
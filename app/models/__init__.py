@@ -20,4 +20,7 @@ from .notifications import Notifications
 from .mindfulness import Mindfulness
 from .appusage import AppUsage
 from .refreshtoken import RefreshToken
-from .bountymilestone import BountyMilestone
\ No newline at end of file
+from .bountymilestone import BountyMilestone
+from .broadcastnotification import BroadcastNotification, BroadcastNotificationState
+from .notificationoutbox import NotificationOutbox
+from .jobrun import JobRun
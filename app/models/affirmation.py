@@ -1,14 +1,42 @@
 from ..db import db
-from datetime import datetime
+from datetime import datetime, time
+from sqlalchemy import text
+from sqlalchemy.orm import validates
+
+def parse_reminder_minute(value):
+    """Minute of the day (0-1439) for a free-text reminder time such as "07:30",
+    "7:30 PM" or "2025-01-01T07:30:00", or None when it can't be read."""
+    if not value:
+        return None
+    value = str(value).strip().upper()
+    if "T" in value:
+        value = value.split("T", 1)[1]  # ISO datetime: keep the time part
+    try:
+        parsed = time.fromisoformat(value)
+        return parsed.hour * 60 + parsed.minute
+    except ValueError:
+        pass
+    for fmt in ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p", "%I %p", "%I%p"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+            return parsed.hour * 60 + parsed.minute
+        except ValueError:
+            continue
+    return None
 
 class DailyAffirmation(db.Model):
     __tablename__ = 'daily_affirmations'
+    __table_args__ = (
+        # ✅ Reminder dispatcher looks up active reminders by minute of the day
+        db.Index('ix_daily_affirmations_reminder_minute', 'reminder_minute', postgresql_where=text('reminder_active')),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     affirmation_text = db.Column(db.String(255), nullable=False)
     date = db.Column(db.String(50), default=datetime.utcnow().strftime('%Y-%m-%d'), nullable=False)
     reminder_active = db.Column(db.Boolean, default=False)  # If reminder is active for this affirmation
     reminder_time = db.Column(db.String(50), nullable=True)  # Time when reminder should trigger
+    reminder_minute = db.Column(db.SmallInteger, nullable=True)  # reminder_time as minute of the user's local day
     bg_image = db.Column(db.String(255), nullable=True)  # URL/path of the background image
     liked = db.Column(db.Boolean, default=False)  # Whether the affirmation is liked
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Creation timestamp
@@ -26,6 +54,11 @@ class DailyAffirmation(db.Model):
         self.liked = liked
         self.created_at = datetime.utcnow()  # Set creation timestamp
 
+    @validates('reminder_time')
+    def validate_reminder_time(self, key, value):
+        self.reminder_minute = parse_reminder_minute(value)
+        return value
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -0,0 +1,75 @@
+from ..db import db
+from datetime import datetime
+
+class BroadcastNotification(db.Model):
+    """A notification stored once and shown to every user (fan-out on read)."""
+    __tablename__ = 'broadcast_notifications'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    navigation = db.Column(db.String(255), nullable=True)
+    body = db.Column(db.Text, nullable=True)
+    image = db.Column(db.String(255), nullable=True)
+    type = db.Column(db.String(50), nullable=False)
+    service = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    live_until = db.Column(db.DateTime, nullable=True)
+    timezone = db.Column(db.String(64), nullable=True)  # Only users in this zone see it; None means everyone
+
+    states = db.relationship('BroadcastNotificationState', backref='broadcast', lazy=True, passive_deletes=True)
+
+    def __init__(self, title, description, navigation, body, image, type, service, live_until=None, timezone=None):
+        self.title = title
+        self.description = description
+        self.navigation = navigation
+        self.body = body
+        self.image = image
+        self.type = type
+        self.service = service
+        self.live_until = live_until
+        self.timezone = timezone
+        self.created_at = datetime.utcnow()
+
+    def to_dict(self, user_id=None, state=None):
+        """Serialize in the same shape as `Notifications.to_dict` for one reader."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'navigation': self.navigation,
+            'body': self.body,
+            'image': self.image,
+            'user_id': user_id,
+            'type': self.type,
+            'service': self.service,
+            'status': 'sent',
+            'is_read': state.is_read if state else False,
+            'created_at': self.created_at.isoformat(),
+            'live_until': self.live_until.isoformat() if self.live_until else None,
+            'broadcast': True
+        }
+
+
+class BroadcastNotificationState(db.Model):
+    """Per-user read/dismiss state for a broadcast; rows exist only once a user acts."""
+    __tablename__ = 'broadcast_notification_states'
+    __table_args__ = (
+        db.UniqueConstraint('broadcast_id', 'user_id', name='uq_broadcast_state_user'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('broadcast_notifications.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    dismissed = db.Column(db.Boolean, default=False, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'broadcast_id': self.broadcast_id,
+            'user_id': self.user_id,
+            'is_read': self.is_read,
+            'dismissed': self.dismissed,
+            'updated_at': self.updated_at.isoformat()
+        }
@@ -3,6 +3,9 @@ from ..db import db
 
 class DailyActivity(db.Model):
     __tablename__ = 'daily_activity'
+    __table_args__ = (
+        db.Index('ix_daily_activity_user_date', 'user_id', 'date'),  # ✅ Activity segments probe one user's recent days
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     date = db.Column(db.String(10), nullable=False, default=datetime.today().strftime('%Y-%m-%d'))
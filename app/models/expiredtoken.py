@@ -5,8 +5,9 @@ class ExpiredToken(db.Model):
     __tablename__ = 'expired_tokens'
     
     id = db.Column(db.Integer, primary_key=True)
-    token = db.Column(db.Text, nullable=False)  # Changed to Text for longer tokens
-    expiration_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    jti = db.Column(db.String(64), nullable=False, unique=True)  # The token's jti (SHA-256 of the token for tokens issued without one)
+    expiration_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)  # When the token itself expires; purged after
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<ExpiredToken {self.token[:30]}...>'  # Truncate display for readability
+        return f'<ExpiredToken {self.jti}>'
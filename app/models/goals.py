@@ -1,6 +1,10 @@
 from ..db import db 
 from datetime import datetime
 
+# ✅ Statuses a goal is never moved out of automatically: to Completed, and to Started
+CLOSED_FOR_COMPLETION = ('Completed', 'Cancelled')
+CLOSED_FOR_START = ('Completed', 'Started', 'Cancelled')
+
 class Goals(db.Model):
     __tablename__="goals"
     
@@ -32,4 +36,15 @@ class Goals(db.Model):
             "end_date": self.end_date.isoformat() if self.end_date else None,
             "status": self.status,
             "created_at": self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+# ✅ Partial expression indexes for the status sweep: only open goals, ordered by when they end / start.
+# Built from the same status tuples as the sweep's WHERE clauses, so the two cannot drift apart.
+db.Index(
+    'ix_goals_open_end_at', Goals.end_date + Goals.end_time,
+    postgresql_where=Goals.status.notin_(CLOSED_FOR_COMPLETION)
+)
+db.Index(
+    'ix_goals_unstarted_start_at', Goals.start_date + Goals.start_time,
+    postgresql_where=Goals.status.notin_(CLOSED_FOR_START)
+)
@@ -0,0 +1,38 @@
+from ..db import db
+from datetime import datetime
+
+class JobRun(db.Model):
+    """History of scheduled job runs that did work, failed or ran long."""
+    __tablename__ = 'job_runs'
+    __table_args__ = (
+        db.Index('ix_job_runs_job_started', 'job_id', 'started_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_id = db.Column(db.String(100), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    finished_at = db.Column(db.DateTime, nullable=False)
+    duration_ms = db.Column(db.Integer, nullable=False)
+    rows = db.Column(db.Integer, nullable=True)  # The job's returned count, if it returns one
+    db_time_ms = db.Column(db.Integer, nullable=False, default=0)
+    db_statements = db.Column(db.Integer, nullable=False, default=0)
+    redis_round_trips = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='ok')  # ok, failed
+    error = db.Column(db.Text, nullable=True)
+    host = db.Column(db.String(255), nullable=True)  # Process that ran it (the scheduler leader)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_id': self.job_id,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat(),
+            'duration_ms': self.duration_ms,
+            'rows': self.rows,
+            'db_time_ms': self.db_time_ms,
+            'db_statements': self.db_statements,
+            'redis_round_trips': self.redis_round_trips,
+            'status': self.status,
+            'error': self.error,
+            'host': self.host
+        }
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class Journaling(db.Model):
     __tablename__ = 'journaling'
+    __table_args__ = (
+        db.Index('ix_journaling_user_date', 'user_id', 'date'),
+    )
 
     # Define the columns
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
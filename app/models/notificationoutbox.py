@@ -0,0 +1,41 @@
+from ..db import db
+from datetime import datetime
+
+class NotificationOutbox(db.Model):
+    """Pending real-time deliveries, written in the same transaction as their notification."""
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        # ✅ Drain order for the delivery worker: status, then priority, then due time
+        db.Index('ix_notification_outbox_drain', 'status', 'priority', 'available_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    notification_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)  # None for broadcasts, which go to `room`
+    room = db.Column(db.String(100), nullable=True)  # Socket.IO room for broadcasts to a group, e.g. "users" or "tz:Asia/Kolkata"
+    event = db.Column(db.String(50), nullable=False, default='new_notification')
+    payload = db.Column(db.JSON, nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=5)  # Lower is delivered first
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, delivered, skipped, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'notification_id': self.notification_id,
+            'user_id': self.user_id,
+            'room': self.room,
+            'event': self.event,
+            'payload': self.payload,
+            'priority': self.priority,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'available_at': self.available_at.isoformat(),
+            'created_at': self.created_at.isoformat(),
+            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None
+        }
@@ -3,7 +3,16 @@ from datetime import datetime
 
 class Notifications(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # ✅ Backs the SKIP LOCKED claim in send_scheduled_notifications
+        db.Index('ix_notifications_status_live_until', 'status', 'live_until'),
+        # ✅ Keyset pagination of a user's inbox in GET /notifications/
+        db.Index('ix_notifications_user_created_id', 'user_id', 'created_at', 'id'),
+        # ✅ Daily partitions on Postgres; retention drops whole days (see notification_partition_service)
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
+    # created_at is part of the key because Postgres requires the partition column in it
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -15,7 +24,7 @@ class Notifications(db.Model):
     service = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), nullable=False, default='pending')
     is_read = db.Column(db.Boolean, default=False)  # ✅ New field to track if notification is read
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
     live_until = db.Column(db.DateTime, nullable=True)
 
     def __init__(self, title, description, navigation, body, image, user_id, type, service, status='pending', live_until=None, is_read=False):
@@ -1,13 +1,21 @@
 from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.orm import validates
 from ..db import db
+from .affirmation import parse_reminder_minute
 
 class PermanentAffirmation(db.Model):
     __tablename__ = 'permanent_affirmations'
+    __table_args__ = (
+        # ✅ Reminder dispatcher looks up active reminders by minute of the day
+        db.Index('ix_permanent_affirmations_reminder_minute', 'reminder_minute', postgresql_where=text('reminder_active')),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     affirmation_text = db.Column(db.String(255), nullable=False)
     reminder_active = db.Column(db.Boolean, default=False)  # If reminder is active for this affirmation
     reminder_time = db.Column(db.String(50), nullable=True)  # Time when reminder should trigger
+    reminder_minute = db.Column(db.SmallInteger, nullable=True)  # reminder_time as minute of the user's local day
     bg_type = db.Column(db.String(50), nullable=True)  # Type of background (e.g., image, video, color)
     bg_image = db.Column(db.String(255), nullable=True)  # URL or path to the background image
     bg_video = db.Column(db.String(255), nullable=True)  # URL or path to the background video
@@ -29,6 +37,11 @@ class PermanentAffirmation(db.Model):
         self.isdark = isdark
         self.created_at = datetime.utcnow()
 
+    @validates('reminder_time')
+    def validate_reminder_time(self, key, value):
+        self.reminder_minute = parse_reminder_minute(value)
+        return value
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -1,7 +1,7 @@
 from ..db import db
 from sqlalchemy.orm import relationship
 from datetime import date
-from werkzeug.security import generate_password_hash, check_password_hash
+from ..password_hashing import hash_password, verify_password
 
 class Professional(db.Model):
     __tablename__ = 'professionals'
@@ -36,6 +36,16 @@ class Professional(db.Model):
     schedules = db.relationship('Schedule', back_populates='professional', lazy=True)
     # device = db.relationship('Device', back_populates='user', uselist=False)
     
+    def set_password(self, password):
+        self.hashed_password = hash_password(password)
+
+    def check_password(self, password):
+        """True if `password` matches; older accounts (plain text or old hash parameters) are upgraded in place."""
+        matches, new_hash = verify_password(self.hashed_password, password)
+        if new_hash:
+            self.hashed_password = new_hash
+        return matches
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -1,5 +1,8 @@
+import hashlib
+import hmac
+import uuid
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import current_app
 from ..db import db
 
 class RefreshToken(db.Model):
@@ -7,18 +10,26 @@ class RefreshToken(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, nullable=False, index=True)
-    token_hash = db.Column(db.String(256), nullable=False, unique=True)  # Store hashed token
+    token_hash = db.Column(db.String(64), nullable=False, unique=True)  # HMAC-SHA256 of the token, hex
+    family_id = db.Column(db.String(32), nullable=False, index=True)  # Every token rotated from the same signin
     role = db.Column(db.String(50), nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False)
     issued_at = db.Column(db.DateTime, default=datetime.utcnow)
-    revoked = db.Column(db.Boolean, default=False)
+    revoked = db.Column(db.Boolean, default=False)  # Rotated, signed out, or revoked after reuse
 
-    def __init__(self, user_id, token, role, expires_in_days=90):
+    def __init__(self, user_id, token, role, expires_in_days=90, family_id=None):
         self.user_id = user_id
-        self.token_hash = generate_password_hash(token)  # Store token securely
+        self.token_hash = self.digest(token)  # Store token securely
         self.role = role
+        self.family_id = family_id or uuid.uuid4().hex
         self.expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
 
+    @staticmethod
+    def digest(token):
+        """Keyed digest of a refresh token. The token is already random, so one HMAC is enough."""
+        key = current_app.config.get("REFRESH_TOKEN_SECRET") or current_app.config["JWT_SECRET_KEY"]
+        return hmac.new(key.encode(), token.encode(), hashlib.sha256).hexdigest()
+
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
@@ -28,12 +39,29 @@ class RefreshToken(db.Model):
         db.session.commit()
 
     @classmethod
-    def is_valid(cls, user_id, token, role):
-        stored_token = cls.query.filter_by(user_id=user_id, role=role, revoked=False).first()
-        if stored_token and check_password_hash(stored_token.token_hash, token):
-            if stored_token.expires_at > datetime.utcnow():
-                return stored_token
-        return None
+    def rotate(cls, token, new_token):
+        """Exchange a presented refresh token for `new_token`, in the same family. The caller commits.
+
+        Returns (new row, "rotated"), or (None, "invalid") for an unknown or
+        expired token. A token that was already rotated is being replayed,
+        so its whole family is revoked and (None, "reused") is returned.
+        """
+        stored_token = cls.query.filter_by(token_hash=cls.digest(token)).with_for_update().first()
+        if stored_token is None or stored_token.expires_at <= datetime.utcnow():
+            return None, "invalid"
+        if stored_token.revoked:
+            cls.query.filter_by(family_id=stored_token.family_id).update({"revoked": True}, synchronize_session=False)
+            return None, "reused"
+
+        stored_token.revoked = True
+        new_refresh_token = cls(
+            user_id=stored_token.user_id,
+            token=new_token,
+            role=stored_token.role,
+            family_id=stored_token.family_id
+        )
+        db.session.add(new_refresh_token)
+        return new_refresh_token, "rotated"
 
     @classmethod
     def revoke_old_tokens(cls, user_id, role):
@@ -5,6 +5,9 @@ from ..db import db
 
 class Schedule(db.Model):
     __tablename__ = 'schedules'
+    __table_args__ = (
+        db.Index('ix_schedules_user_start', 'user_id', 'start_time'),
+    )
     
     id = Column(Integer, primary_key=True)
     professional_id = Column(Integer, ForeignKey('professionals.id'), nullable=False)
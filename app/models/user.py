@@ -1,6 +1,7 @@
 from ..db import db
+from ..config import Config
 from sqlalchemy.orm import relationship
-from werkzeug.security import generate_password_hash, check_password_hash
+from ..password_hashing import hash_password, verify_password
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -30,6 +31,8 @@ class User(db.Model):
     plan= db.Column(db.String(255), default='basic')
     user_status = db.Column(db.Integer, nullable=False, default=1)
     sign_up_date = db.Column(db.String(50))
+    last_active = db.Column(db.DateTime, nullable=True, index=True)  # Written behind from Redis by flush_last_active
+    timezone = db.Column(db.String(64), nullable=False, default=Config.DEFAULT_TIMEZONE, server_default=Config.DEFAULT_TIMEZONE, index=True)  # IANA name, e.g. "Asia/Kolkata"
     permanent_affirmation = db.relationship('PermanentAffirmation', back_populates='user', uselist=False)
     daily_affirmations = db.relationship('DailyAffirmation', back_populates='user')
     reminders = db.relationship('Reminder', back_populates='user')
@@ -41,10 +44,14 @@ class User(db.Model):
     bounty_milestone = db.relationship('BountyMilestone', back_populates='user',uselist=False)
     signup_using = db.Column(db.String(10), nullable=False, default='phone')
     def set_password(self, password):
-        self.hashed_password = generate_password_hash(password)
+        self.hashed_password = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.hashed_password, password)
+        """True if `password` matches; upgrades the stored hash in place when it uses old parameters."""
+        matches, new_hash = verify_password(self.hashed_password, password)
+        if new_hash:
+            self.hashed_password = new_hash
+        return matches
 
     def to_dict(self):
         return {
@@ -64,6 +71,7 @@ class User(db.Model):
             "user_status": self.user_status,
             "plan": self.plan,
             "sign_up_date": self.sign_up_date,
+            "timezone": self.timezone,
             "surname":self.surname,
             "affirmation_onboarding":self.affirmation_onboarding,
             "journaling_onboarding":self.journaling_onboarding,
@@ -0,0 +1,77 @@
+import hmac
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+from .config import Config
+
+class PasswordHashingBusy(Exception):
+    """The hashing pool is full or too slow; callers answer 503 instead of tying up a request worker."""
+
+# ✅ Requests waiting on a hash at once (running + queued); beyond that new ones are turned away
+_slots = threading.BoundedSemaphore(Config.PASSWORD_HASH_WORKERS + Config.PASSWORD_HASH_QUEUE_SIZE)
+_executor = None
+_executor_lock = threading.Lock()
+
+def _pool():
+    """The process pool, created on first use so every web worker starts its own.
+
+    Children are spawned, not forked: the web worker runs request, scheduler and
+    listener threads, and a fork could copy a lock one of them holds (logging,
+    Redis or database pools) into a child that then never gets it back.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=Config.PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def _run(func, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHashingBusy("Too many password checks in progress")
+    try:
+        future = _pool().submit(func, *args)
+    except Exception:
+        _slots.release()
+        raise
+    # ✅ The slot frees when the hash finishes, even if this request stopped waiting for it
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=Config.PASSWORD_HASH_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        raise PasswordHashingBusy("Password check timed out")
+
+def hash_password(password):
+    """Hash with PASSWORD_HASH_METHOD (werkzeug's default when unset), off the request thread."""
+    if Config.PASSWORD_HASH_METHOD:
+        return _run(generate_password_hash, password, Config.PASSWORD_HASH_METHOD)
+    return _run(generate_password_hash, password)
+
+def needs_rehash(stored_hash):
+    """Plain-text rows always; hashed rows only when PASSWORD_HASH_METHOD opts in to another method."""
+    if "$" not in (stored_hash or ""):
+        return True
+    return bool(Config.PASSWORD_HASH_METHOD) and not stored_hash.startswith(f"{Config.PASSWORD_HASH_METHOD}$")
+
+def verify_password(stored_hash, password):
+    """Check `password` against `stored_hash`. Returns (matches, replacement hash or None).
+
+    The replacement is set when the password matched but was stored in plain
+    text (old professional accounts) or with another method than an explicit
+    PASSWORD_HASH_METHOD; the caller saves it. Rehashing is best effort: when
+    the pool is busy the login still succeeds and a later one upgrades the hash.
+    """
+    if not stored_hash or not password:
+        return False, None
+    if "$" not in stored_hash:
+        matches = hmac.compare_digest(stored_hash.encode(), password.encode())  # Legacy plain-text row
+    else:
+        matches = _run(check_password_hash, stored_hash, password)
+    if matches and needs_rehash(stored_hash):
+        try:
+            return True, hash_password(password)
+        except PasswordHashingBusy:
+            return True, None
+    return matches, None
@@ -0,0 +1,33 @@
+from .redis_config import redis_client
+
+# ✅ Hash of user_id -> socket session id, maintained by the Socket.IO connect/disconnect handlers
+ACTIVE_USERS_KEY = "active_users"
+
+# ✅ Ids per HMGET so a huge batch never becomes one giant Redis command
+PRESENCE_BATCH_SIZE = 1000
+
+def online_user_ids(user_ids, client=None, batch_size=PRESENCE_BATCH_SIZE):
+    """Return the subset of `user_ids` that currently have an active socket.
+
+    The whole batch is answered with one pipelined round trip of HMGET calls
+    instead of one HEXISTS per user. Ids come back in the type they were
+    passed in.
+    """
+    client = client or redis_client
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+
+    pipe = client.pipeline(transaction=False)
+    for start in range(0, len(user_ids), batch_size):
+        pipe.hmget(ACTIVE_USERS_KEY, [str(uid) for uid in user_ids[start:start + batch_size]])
+
+    online = set()
+    for start, sessions in zip(range(0, len(user_ids), batch_size), pipe.execute()):
+        batch = user_ids[start:start + batch_size]
+        online.update(uid for uid, sid in zip(batch, sessions) if sid is not None)
+    return online
+
+def is_online(user_id, client=None):
+    """Single-user convenience wrapper around `online_user_ids`."""
+    return user_id in online_user_ids([user_id], client=client)
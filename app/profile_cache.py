@@ -0,0 +1,57 @@
+import json
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from .db import db
+from .models import User, Professional
+from .redis_config import redis_client
+
+# ✅ Profiles used to ride inside every JWT; now they are cached here per (role, id)
+PROFILE_KEY = "profile:{}:{}"
+PROFILE_TTL_SECONDS = 3600
+# Session.info entry collecting the profiles changed in the current transaction
+_CHANGED_PROFILES = "changed_profiles"
+
+def _profile_key(user_id, role):
+    return PROFILE_KEY.format("user" if role == "user" else "professional", user_id)
+
+def get_profile(user_id, role="user"):
+    """`to_dict()` of the user (role "user") or professional (any other role), from Redis when cached."""
+    key = _profile_key(user_id, role)
+    cached = redis_client.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    account = db.session.get(User if role == "user" else Professional, user_id)
+    if account is None:
+        return None
+    profile = account.to_dict()
+    redis_client.set(key, json.dumps(profile, default=str), ex=PROFILE_TTL_SECONDS)
+    return profile
+
+def invalidate_profile(user_id, role="user"):
+    """Drop a cached profile. Account writes through the ORM do this on commit by themselves."""
+    redis_client.delete(_profile_key(user_id, role))
+
+# ✅ Every ORM update or delete of an account drops its cached profile once the
+# transaction commits, whichever route made it; a rollback forgets the change
+def _account_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        role = "user" if isinstance(target, User) else "professional"
+        session.info.setdefault(_CHANGED_PROFILES, set()).add((target.id, role))
+
+for _model in (User, Professional):
+    event.listen(_model, "after_update", _account_changed)
+    event.listen(_model, "after_delete", _account_changed)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_profiles(session):
+    for user_id, role in session.info.pop(_CHANGED_PROFILES, ()):
+        try:
+            invalidate_profile(user_id, role)
+        except Exception as e:
+            print(f"⚠️ Failed to invalidate profile {role}:{user_id}: {str(e)}")
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_profiles(session):
+    session.info.pop(_CHANGED_PROFILES, None)
@@ -1,5 +1,9 @@
 import redis
+from .instrumentation import CountingConnection
 
 # Connect to Redis (Ensure Redis is running)
-redis_client = redis.StrictRedis(host='localhost', port=6379, db=0, decode_responses=True)
-
+redis_client = redis.StrictRedis(
+    connection_pool=redis.ConnectionPool(
+        host='localhost', port=6379, db=0, decode_responses=True, connection_class=CountingConnection
+    )
+)
@@ -0,0 +1,172 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from .db import db
+from .models import ExpiredToken
+from .redis_config import redis_client
+from .token_cache import evict_token
+
+# ✅ One key per revoked token, living exactly as long as the token would have
+REVOKED_TOKEN_KEY = "tokens:revoked:{}"
+# ✅ Every process adds revoked ids published here to its own Bloom filter
+REVOCATIONS_CHANNEL = "tokens:revocations"
+REBUILD_MESSAGE = "*rebuild"
+
+BLOOM_CAPACITY = 100000
+BLOOM_ERROR_RATE = 0.01
+LISTENER_RETRY_SECONDS = 5
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys: no false negatives, ~`error_rate` false positives."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.sha256(key.encode()).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:16], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+# ✅ Revoked token ids still inside their lifetime. Until the first load (or after
+# the listener loses Redis) every lookup goes to Redis / the database instead.
+_filter = BloomFilter(BLOOM_CAPACITY)
+_filter_ready = threading.Event()
+
+def token_id(token, claims=None):
+    """Stable id for a token: its `jti` claim when it has one, otherwise a digest of the token."""
+    jti = (claims or {}).get("jti")
+    return jti or hashlib.sha256(token.encode()).hexdigest()
+
+def is_revoked(token_id):
+    """True if the token was revoked.
+
+    Tokens the local Bloom filter has never seen are answered from memory;
+    only filter hits (revoked tokens and rare false positives) cost a Redis
+    lookup, and only a Redis miss or failure reaches the database.
+    """
+    if _filter_ready.is_set() and token_id not in _filter:
+        return False
+    try:
+        if redis_client.exists(REVOKED_TOKEN_KEY.format(token_id)):
+            return True
+    except Exception as e:
+        print(f"⚠️ Revocation cache unavailable, checking the database: {str(e)}")
+
+    expiration_date = db.session.execute(
+        select(ExpiredToken.expiration_date).where(ExpiredToken.jti == token_id)
+    ).scalar()
+    if expiration_date is None:
+        return False
+    try:
+        _cache(token_id, expiration_date)
+    except Exception:
+        pass
+    return True
+
+def revoke_token(token_id, expires_at):
+    """Record a revocation in the current transaction; call `publish_revocation` after committing.
+
+    `expires_at` is the token's own expiry (datetime or epoch seconds).
+    """
+    if not isinstance(expires_at, datetime):
+        expires_at = datetime.utcfromtimestamp(expires_at)
+    db.session.execute(
+        pg_insert(ExpiredToken).values(
+            jti=token_id, expiration_date=expires_at, revoked_at=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=["jti"])
+    )
+    return expires_at
+
+def _cache(token_id, expires_at):
+    ttl = int((expires_at - datetime.utcnow()).total_seconds())
+    if ttl > 0:
+        redis_client.set(REVOKED_TOKEN_KEY.format(token_id), 1, ex=ttl)
+
+def publish_revocation(token_id, expires_at):
+    """Make a committed revocation visible: Redis key, this process's filter and token cache, and every other process's."""
+    if not isinstance(expires_at, datetime):
+        expires_at = datetime.utcfromtimestamp(expires_at)
+    _filter.add(token_id)
+    evict_token(token_id)
+    _cache(token_id, expires_at)
+    redis_client.publish(REVOCATIONS_CHANNEL, token_id)
+
+def rebuild_revocation_filter():
+    """Reload the local Bloom filter from the unexpired revocations in the database."""
+    global _filter
+    now = datetime.utcnow()
+    count = db.session.execute(
+        select(func.count()).select_from(ExpiredToken).where(ExpiredToken.expiration_date > now)
+    ).scalar()
+    rebuilt = BloomFilter(max(BLOOM_CAPACITY, 2 * count))
+    with db.engine.connect() as connection:
+        result = connection.execution_options(yield_per=10000).execute(
+            select(ExpiredToken.jti).where(ExpiredToken.expiration_date > now)
+        )
+        for revoked_id in result.scalars():
+            rebuilt.add(revoked_id)
+    db.session.commit()
+
+    _filter = rebuilt
+    _filter_ready.set()
+    return count
+
+def purge_expired_revocations():
+    """Delete revocations of tokens that have expired anyway, then have every process rebuild its filter."""
+    deleted = db.session.execute(
+        delete(ExpiredToken).where(ExpiredToken.expiration_date <= datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    db.session.commit()
+    redis_client.publish(REVOCATIONS_CHANNEL, REBUILD_MESSAGE)
+    return deleted
+
+def start_revocation_listener(app):
+    """Keep this process's Bloom filter in sync with revocations made anywhere.
+
+    Subscribes before loading the filter from the database so nothing revoked
+    in between is missed. If the subscription drops, lookups fall back to
+    Redis / the database until it is back and the filter has been reloaded.
+    """
+    def listen():
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(REVOCATIONS_CHANNEL)
+                with app.app_context():
+                    rebuild_revocation_filter()
+                for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    if message["data"] == REBUILD_MESSAGE:
+                        with app.app_context():
+                            rebuild_revocation_filter()
+                    else:
+                        _filter.add(message["data"])
+                        evict_token(message["data"])  # ✅ Also forget the verified claims
+            except Exception as e:
+                print(f"❌ Token revocation listener stopped: {str(e)}")
+            finally:
+                _filter_ready.clear()
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(LISTENER_RETRY_SECONDS)
+
+    thread = threading.Thread(target=listen, name="token-revocations", daemon=True)
+    thread.start()
+    return thread
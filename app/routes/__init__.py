@@ -15,6 +15,7 @@ def register_routes(app):
     from .extras import extras_bp
     from .notifications import notifications_bp
     from .appusage import app_usage_bp
+    from .admin import admin_bp
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(user_bp, url_prefix='/user')
@@ -31,5 +32,6 @@ def register_routes(app):
     app.register_blueprint(extras_bp, url_prefix = '/new')
     app.register_blueprint(notifications_bp, url_prefix='/notifications')
     app.register_blueprint(app_usage_bp, url_prefix='/app-usage')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
     
 
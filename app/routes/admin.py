@@ -0,0 +1,104 @@
+import time
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select, func
+from ..db import db
+from ..models import JobRun, Notifications, NotificationOutbox
+from ..redis_config import redis_client
+from ..utils import admin_required
+from ..services.leader_election import leader_elector
+from ..services.notification_scheduler_service import scheduler
+from ..services.job_metrics import get_job_metrics, get_process_job_stats, get_dispatch_lag
+from ..services.delayed_queue import QUEUE_KEY
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/scheduler/leader', methods=['GET'])
+@admin_required
+def get_scheduler_leader():
+    try:
+        return jsonify({
+            "message": "Scheduler leader fetched successfully",
+            "scheduler": leader_elector.current_leader()
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/jobs', methods=['GET'])
+@admin_required
+def get_jobs():
+    """Every scheduled job with its next run and the metrics of its recent runs."""
+    try:
+        jobs = scheduler.get_jobs()
+        metrics = get_job_metrics([job.id for job in jobs])
+        process_stats = get_process_job_stats()
+        return jsonify({
+            "message": "Jobs fetched successfully",
+            "scheduler_running": scheduler.running,
+            "is_leader": leader_elector.is_leader,
+            "jobs": [{
+                "id": job.id,
+                "name": job.name,
+                "executor": job.executor,
+                "trigger": str(job.trigger),
+                "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None,
+                "metrics": metrics.get(job.id, {}),
+                "process_stats": process_stats.get(job.id, {})
+            } for job in jobs]
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@admin_bp.route('/jobs/<job_id>/runs', methods=['GET'])
+@admin_required
+def get_job_runs(job_id):
+    """Recent runs of one job, newest first. Pass `before_id` for the next page."""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        before_id = request.args.get('before_id', type=int)
+
+        query = select(JobRun).where(JobRun.job_id == job_id)
+        if before_id:
+            query = query.where(JobRun.id < before_id)
+        runs = db.session.execute(query.order_by(JobRun.id.desc()).limit(limit)).scalars().all()
+
+        return jsonify({
+            "message": "Job runs fetched successfully",
+            "runs": [run.to_dict() for run in runs],
+            "next_before_id": runs[-1].id if len(runs) == limit else None
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/dispatch-lag', methods=['GET'])
+@admin_required
+def get_dispatch_lag_stats():
+    """Due-to-push lag per notification type, plus what is due but not yet sent."""
+    try:
+        now = datetime.utcnow()
+        outbox_due, outbox_oldest = db.session.execute(
+            select(func.count(), func.min(NotificationOutbox.available_at)).where(
+                NotificationOutbox.status == "pending",
+                NotificationOutbox.available_at <= now
+            )
+        ).one()
+        scheduled_oldest = db.session.execute(
+            select(func.min(Notifications.live_until)).where(
+                Notifications.status == "pending",
+                Notifications.live_until <= now
+            )
+        ).scalar()
+
+        return jsonify({
+            "message": "Dispatch lag fetched successfully",
+            "lag": get_dispatch_lag(),
+            "backlog": {
+                "outbox_due": outbox_due,
+                "outbox_oldest_seconds": int((now - outbox_oldest).total_seconds()) if outbox_oldest else 0,
+                "scheduled_oldest_seconds": int((now - scheduled_oldest).total_seconds()) if scheduled_oldest else 0,
+                "delayed_due": redis_client.zcount(QUEUE_KEY, "-inf", time.time())
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
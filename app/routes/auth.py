@@ -1,13 +1,15 @@
 from flask import Blueprint, request, jsonify,url_for, redirect
 from authlib.integrations.flask_client import OAuth
-from ..models import OTP, User, BountyPoints, BugBountyWallet, Professional, ExpiredToken, Device, RefreshToken
+from ..models import OTP, User, BountyPoints, BugBountyWallet, Professional, Device, RefreshToken
 from ..db import db
 import jwt
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
 from flask import current_app
 from sqlalchemy import or_, and_
-from ..utils import token_required
+from ..utils import token_required, issue_token
+from ..profile_cache import get_profile
+from ..revocation import token_id, is_revoked, revoke_token, publish_revocation
 from .aws import send_email, send_sms, send_otp_email
 
 oauth = OAuth()
@@ -31,14 +33,8 @@ google = oauth.register(
     authorize_url="https://accounts.google.com/o/oauth2/auth",
 )
 
-def generate_jwt_token(user, expires_in):
-    payload = {
-        "user_id":user.id,
-        "user": user.to_dict(),
-        "role":"user",
-        "exp": (datetime.utcnow() + expires_in).timestamp()
-    }
-    return jwt.encode(payload, current_app.config['JWT_SECRET_KEY'], algorithm='HS256')
+def generate_jwt_token(user, expires_in, refresh=False):
+    return issue_token(user.id, "user", expires_in, refresh=refresh)
 
 # signup with google
 @auth_bp.route("/google/signup", methods=["POST"])
@@ -151,7 +147,7 @@ def signup():
         # Create a wallet and link the bounty points
 
         token = generate_jwt_token(new_user, ACCESS_TOKEN_EXPIRY)
-        refresh_token = generate_jwt_token(new_user, REFRESH_TOKEN_EXPIRY)
+        refresh_token = generate_jwt_token(new_user, REFRESH_TOKEN_EXPIRY, refresh=True)
         
         RefreshToken.revoke_old_tokens(new_user.id, role)
         new_refresh_token = RefreshToken(user_id=new_user.id, token=refresh_token, role=role)
@@ -215,7 +211,7 @@ def signin():
         return jsonify({"message": "Invalid password"}), 401
 
     token = generate_jwt_token(user, ACCESS_TOKEN_EXPIRY)
-    refresh_token = generate_jwt_token(user, REFRESH_TOKEN_EXPIRY)
+    refresh_token = generate_jwt_token(user, REFRESH_TOKEN_EXPIRY, refresh=True)
 
     RefreshToken.revoke_old_tokens(user.id, user.role)
     new_refresh_token = RefreshToken(user_id=user.id, token=refresh_token, role=user.role)
@@ -255,52 +251,59 @@ def refresh():
     
     if not token:
         return jsonify({"message": "Token is missing."}), 401
+
+    data = request.get_json(silent=True) or {}
+    presented_refresh_token = data.get('refresh_token') or data.get('refresh-token') or request.headers.get('Refresh-Token')
     
     try:
         # Extract the actual token from the Authorization header
         token = token.split(" ")[1]
 
-        # Decode the access token
-        decoded_token = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=["HS256"])
-        user = decoded_token.get('user')  # Get the entire user object from the token
+        # Decode the access token; it may have expired, but it must still be ours
+        decoded_token = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=["HS256"], options={"verify_exp": False})
+        user_id = decoded_token.get('user_id')
         role = decoded_token.get('role')  # Access the role from the token
 
-        if not user or not role:
+        if not user_id or not role:
             return jsonify({"message": "Invalid token structure.", "status": "Unauthorized"}), 401
 
-        # Check if the access token is in the expired tokens table
-        expired_token = ExpiredToken.query.filter_by(token=token).first()
-        if expired_token:
+        # Check if the access token has been revoked
+        if is_revoked(token_id(token, decoded_token)):
             return jsonify({"message": "User has logged out", "status": "Logged out"}), 401
         
         # Check if the access token is expired
-        if datetime.utcfromtimestamp(decoded_token['exp']) < datetime.utcnow():
-            # Access token is expired, now check for the refresh token in the database
-            refresh_token = RefreshToken.query.filter_by(user_id=user['id'], role=role, revoked=False).first()
-            
-            if not refresh_token:
-                return jsonify({"message": "Refresh token not found or revoked.", "status": "Unauthorized"}), 401
-            
-            # Generate a new access token and refresh token
-            token = generate_jwt_token(user, ACCESS_TOKEN_EXPIRY)
-            refresh_token = generate_jwt_token(user, REFRESH_TOKEN_EXPIRY)
-        
-            RefreshToken.revoke_old_tokens(user.id, role)
-            new_refresh_token = RefreshToken(user_id=user.id, token=refresh_token, role=role)
-            db.session.add(new_refresh_token)
-            db.session.commit()
-
-            return jsonify({
-                "message": "New token generated",
-                "status": "New token",
-                "token": token,
-                "refresh-token": refresh_token  # Send the new refresh token
-            }), 200
+        if datetime.utcfromtimestamp(decoded_token['exp']) >= datetime.utcnow():
+            return jsonify({"message": "Access token is still valid", "status": "Valid token"}), 200
+
+        if not presented_refresh_token:
+            return jsonify({"message": "Refresh token is missing.", "status": "Unauthorized"}), 401
+
+        refresh_claims = jwt.decode(presented_refresh_token, current_app.config['JWT_SECRET_KEY'], algorithms=["HS256"])
+        if refresh_claims.get('type') != 'refresh' or refresh_claims.get('user_id') != user_id:
+            return jsonify({"message": "Invalid refresh token.", "status": "Unauthorized"}), 401
+
+        # Generate a new access token and rotate the refresh token (one indexed lookup)
+        token = issue_token(user_id, role, ACCESS_TOKEN_EXPIRY)
+        refresh_token = issue_token(user_id, role, REFRESH_TOKEN_EXPIRY, refresh=True)
+        new_refresh_token, outcome = RefreshToken.rotate(presented_refresh_token, refresh_token)
+
+        if outcome == "reused":
+            db.session.commit()  # ✅ Keep the family revocation
+            return jsonify({"message": "Refresh token was already used. Please sign in again.", "status": "Reused"}), 401
+        if not new_refresh_token:
+            db.session.rollback()
+            return jsonify({"message": "Refresh token not found or revoked.", "status": "Unauthorized"}), 401
+        db.session.commit()
 
-        return jsonify({"message": "Access token is still valid", "status": "Valid token"}), 200
+        return jsonify({
+            "message": "New token generated",
+            "status": "New token",
+            "token": token,
+            "refresh-token": refresh_token  # Send the new refresh token
+        }), 200
 
     except jwt.ExpiredSignatureError:
-        return jsonify({"message": "Access token has expired.", "status": "Expired"}), 401
+        return jsonify({"message": "Refresh token has expired. Please sign in again.", "status": "Expired"}), 401
     except jwt.InvalidTokenError:
         return jsonify({"message": "Invalid access token.", "status": "Unauthorized"}), 401
 
@@ -651,6 +654,18 @@ def add_bounty_points(current_user):
     }), 200
 # Update bounty points
 
+@auth_bp.route('/me', methods=['GET'])
+@token_required
+def get_me(current_user):
+    """Profile of the token's account; tokens no longer carry it."""
+    try:
+        profile = get_profile(current_user.get('user_id'), current_user.get('role', 'user'))
+        if profile is None:
+            return jsonify({"message": "User not found"}), 404
+        return jsonify({"message": "Profile fetched successfully", "user": profile}), 200
+    except Exception as e:
+        return jsonify({"message": f"Error fetching profile: {str(e)}"}), 500
+
 @auth_bp.route('/signout', methods=['POST'])
 def signout():
     auth_header = request.headers.get("Authorization")
@@ -662,17 +677,18 @@ def signout():
     try:
         # Decode JWT access token
         decoded_token = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=["HS256"])
-        user_id = decoded_token["user"]["id"]  # Extract user ID
+        user_id = decoded_token["user_id"]  # Extract user ID
         role = decoded_token["role"]  # Extract user role
 
-        # Blacklist the access token (store in database)
-        expired_token = ExpiredToken(token=token, expiration_date=datetime.utcnow())
-        db.session.add(expired_token)
+        # Blacklist the access token until it would have expired anyway
+        revoked_id = token_id(token, decoded_token)
+        expires_at = revoke_token(revoked_id, decoded_token["exp"])
 
         # Revoke all refresh tokens for this user & role
         RefreshToken.revoke_old_tokens(user_id, role)
         # Commit changes
         db.session.commit()
+        publish_revocation(revoked_id, expires_at)  # ✅ Redis key + every process's Bloom filter
 
         return jsonify({"message": "Successfully signed out."}), 200
 
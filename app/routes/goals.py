@@ -3,6 +3,7 @@ from datetime import datetime, time
 from ..models import Goals, User, DailyActivity
 from ..db import db
 from ..utils import token_required
+from ..services.goal_service import schedule_goal_transitions, unschedule_goal_transition
 from sqlalchemy import func
 
 goal_bp = Blueprint('goal', __name__)
@@ -106,6 +107,7 @@ def add_goal(current_user):
             # If DailyActivity exists, update visionboard to True
             daily_activity.goalsetting = True
         db.session.commit()
+        schedule_goal_transitions([new_goal])  # ✅ Timer for its Started / Completed transitions
 
         return jsonify({
             "message": "Goal added successfully",
@@ -249,6 +251,7 @@ def update_goal(current_user, goal_id):
 
         # Commit changes
         db.session.commit()
+        schedule_goal_transitions([goal])  # ✅ Dates or times may have moved
 
         return jsonify({
             "message": "Goal updated successfully",
@@ -278,6 +281,7 @@ def update_goal_status(current_user,goal_id):
 
         # Commit the changes to the database
         db.session.commit()
+        schedule_goal_transitions([goal])  # ✅ Cancelled / Completed goals leave the timer index
 
         return jsonify({
             "message": "Goal status updated successfully",
@@ -304,6 +308,7 @@ def delete_goal(current_user, goal_id):
         # Delete the goal from the database
         db.session.delete(goal)
         db.session.commit()
+        unschedule_goal_transition(goal_id)
 
         return jsonify({
             "message": f"Goal with ID {goal_id} deleted successfully"
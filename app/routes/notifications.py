@@ -1,31 +1,232 @@
 from ..utils import token_required
 from flask import Blueprint, request, jsonify, current_app
-from ..models import Notifications
+from ..models import Notifications, BroadcastNotification, BroadcastNotificationState
 from ..db import db
+from ..services.unread_counter_service import get_unread_count, increment_unread, decrement_unread, set_broadcast_read, refresh_unread_counter
+from ..timezones import get_user_timezone
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, tuple_, update, select, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+import base64
 
 notifications_bp = Blueprint('notifications',__name__)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# ✅ The inbox merges two tables whose ids are independent, so positions are
+# (created_at, source, id); at equal times personal notifications come first
+BROADCAST_SOURCE = 0
+NOTIFICATION_SOURCE = 1
+
+def encode_cursor(created_at, source, item_id):
+    """Opaque keyset cursor for the (created_at, source, id) position of an inbox item."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{source}|{item_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    parts = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    if len(parts) == 2:
+        parts.insert(1, NOTIFICATION_SOURCE)  # Cursor from before sources were tagged
+    created_at, source, item_id = parts
+    return datetime.fromisoformat(created_at), int(source), int(item_id)
+
+def before_cursor(created_at_column, id_column, source, cursor, inclusive=False):
+    """Condition for rows of `source` that sort after `cursor` in the newest-first inbox
+    (or at it, with `inclusive`). Resolved per source so each query keeps a plain seek."""
+    created_at, cursor_source, item_id = cursor
+    if source < cursor_source:
+        return created_at_column <= created_at
+    if source > cursor_source:
+        return created_at_column < created_at
+    position = tuple_(created_at_column, id_column)
+    return position <= (created_at, item_id) if inclusive else position < (created_at, item_id)
+
+def parse_bool(value):
+    return value.lower() in ("1", "true", "yes")
+
+def visible_broadcasts(timezone):
+    """Broadcasts sent to everyone, plus the ones sent to the user's timezone."""
+    return or_(BroadcastNotification.timezone.is_(None), BroadcastNotification.timezone == timezone)
+
 @notifications_bp.route("/", methods=['GET'])
 @token_required
 def get_notifications(current_user):
+    """Newest-first inbox page.
+
+    Query params: `limit` (default 50, max 100), `cursor` (the `next_cursor` of
+    the previous page), and optional `type` and `is_read` filters. Personal
+    notifications and broadcasts are each read with a keyset seek on
+    (created_at, id) and merged on (created_at, source, id), so page cost
+    does not grow with the inbox and equal timestamps never skip or repeat items.
+    """
     user_id = current_user.get('user_id')
 
     if not user_id:
         return jsonify({"message": "User ID not found"}), 400
 
-    notifications = Notifications.query.filter_by(user_id=user_id).order_by(Notifications.created_at.desc()).all()
+    try:
+        limit = min(max(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except (ValueError, TypeError):
+        return jsonify({"message": "Invalid limit or cursor"}), 400
+    notification_type = request.args.get("type")
+    is_read = parse_bool(request.args["is_read"]) if "is_read" in request.args else None
+
+    # ✅ Seek on (user_id, created_at, id); served by ix_notifications_user_created_id
+    query = Notifications.query.filter(Notifications.user_id == user_id)
+    if cursor:
+        query = query.filter(before_cursor(Notifications.created_at, Notifications.id, NOTIFICATION_SOURCE, cursor))
+    if notification_type:
+        query = query.filter(Notifications.type == notification_type)
+    if is_read is not None:
+        query = query.filter(Notifications.is_read.is_(True) if is_read else Notifications.is_read.isnot(True))
+    notifications = query.order_by(Notifications.created_at.desc(), Notifications.id.desc()).limit(limit + 1).all()
+
+    # Broadcasts are stored once; attach this user's read state and hide dismissed ones
+    broadcast_query = db.session.query(BroadcastNotification, BroadcastNotificationState).outerjoin(
+        BroadcastNotificationState,
+        and_(
+            BroadcastNotificationState.broadcast_id == BroadcastNotification.id,
+            BroadcastNotificationState.user_id == user_id
+        )
+    ).filter(
+        visible_broadcasts(get_user_timezone(user_id)),
+        or_(BroadcastNotificationState.dismissed.is_(None), BroadcastNotificationState.dismissed.is_(False))
+    )
+    if cursor:
+        broadcast_query = broadcast_query.filter(
+            before_cursor(BroadcastNotification.created_at, BroadcastNotification.id, BROADCAST_SOURCE, cursor)
+        )
+    if notification_type:
+        broadcast_query = broadcast_query.filter(BroadcastNotification.type == notification_type)
+    if is_read is not None:
+        broadcast_query = broadcast_query.filter(
+            BroadcastNotificationState.is_read.is_(True) if is_read else BroadcastNotificationState.is_read.isnot(True)
+        )
+    broadcasts = broadcast_query.order_by(
+        BroadcastNotification.created_at.desc(), BroadcastNotification.id.desc()
+    ).limit(limit + 1).all()
+
+    # Merge both sources newest first and cut the page
+    items = [
+        (notification.created_at, NOTIFICATION_SOURCE, notification.id, notification.to_dict())
+        for notification in notifications
+    ]
+    items += [
+        (broadcast.created_at, BROADCAST_SOURCE, broadcast.id, broadcast.to_dict(user_id=user_id, state=state))
+        for broadcast, state in broadcasts
+    ]
+    items.sort(key=lambda item: item[:3], reverse=True)
+    page = items[:limit]
 
-    # Serialize notifications
-    notifications_data = [notification.to_dict() for notification in notifications]
+    next_cursor = encode_cursor(*page[-1][:3]) if len(items) > limit else None
 
     return jsonify({
         "message": "Notifications fetched successfully",
-        "notifications": notifications_data
+        "notifications": [item[3] for item in page],
+        "next_cursor": next_cursor
     }), 200
     
+@notifications_bp.route("/unread-count", methods=['GET'])
+@token_required
+def get_notifications_unread_count(current_user):
+    user_id = current_user.get('user_id')
+
+    if not user_id:
+        return jsonify({"message": "User ID not found"}), 400
+
+    return jsonify({
+        "message": "Unread count fetched successfully",
+        "unread_count": get_unread_count(user_id, get_user_timezone(user_id))
+    }), 200
+
+@notifications_bp.route("/bulk", methods=['PATCH'])
+@token_required
+def bulk_update_notifications(current_user):
+    """Apply `is_read` and/or `status` to many notifications in one UPDATE.
+
+    Scope with exactly one of `ids` (list of notification ids), `before` (an
+    inbox cursor; everything at or older than it) or `all: true`. `before` and
+    `all` also mark the matching broadcasts when `is_read` is given.
+    """
+    user_id = current_user.get('user_id')
+
+    if not user_id:
+        return jsonify({"message": "User ID not found"}), 400
+
+    data = request.json or {}
+    scopes = [scope for scope in ("ids", "before", "all") if data.get(scope)]
+    if len(scopes) != 1:
+        return jsonify({"message": "Provide exactly one of ids, before or all"}), 400
+    if "is_read" not in data and "status" not in data:
+        return jsonify({"message": "Nothing to update; send is_read and/or status"}), 400
+
+    conditions = [Notifications.user_id == user_id]
+    broadcast_conditions = [visible_broadcasts(get_user_timezone(user_id))]
+    if scopes[0] == "ids":
+        if not isinstance(data["ids"], list):
+            return jsonify({"message": "ids must be a list"}), 400
+        conditions.append(Notifications.id.in_(data["ids"]))
+    elif scopes[0] == "before":
+        try:
+            cursor = decode_cursor(data["before"])
+        except (ValueError, TypeError):
+            return jsonify({"message": "Invalid cursor"}), 400
+        conditions.append(before_cursor(Notifications.created_at, Notifications.id, NOTIFICATION_SOURCE, cursor, inclusive=True))
+        broadcast_conditions.append(
+            before_cursor(BroadcastNotification.created_at, BroadcastNotification.id, BROADCAST_SOURCE, cursor, inclusive=True)
+        )
+
+    values = {}
+    if "is_read" in data:
+        values["is_read"] = bool(data["is_read"])
+        if "status" not in data:
+            # ✅ Only rows that actually change count as affected
+            conditions.append(Notifications.is_read.isnot(values["is_read"]))
+    if "status" in data:
+        values["status"] = data["status"]
+
+    try:
+        updated = db.session.execute(
+            update(Notifications).where(*conditions).values(**values),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+
+        broadcasts_updated = 0
+        if "is_read" in data and scopes[0] != "ids":
+            # ✅ Upsert this user's state for every matching broadcast in one statement
+            state = BroadcastNotificationState.__table__
+            upsert = pg_insert(state).from_select(
+                ["broadcast_id", "user_id", "is_read", "dismissed", "updated_at"],
+                select(
+                    BroadcastNotification.id,
+                    literal(user_id),
+                    literal(values["is_read"]),
+                    literal(False),
+                    literal(datetime.utcnow())
+                ).where(*broadcast_conditions)
+            )
+            upsert = upsert.on_conflict_do_update(
+                constraint="uq_broadcast_state_user",
+                set_={"is_read": upsert.excluded.is_read, "updated_at": upsert.excluded.updated_at}
+            )
+            broadcasts_updated = db.session.execute(upsert).rowcount
+
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": "Error updating notifications", "error": str(e)}), 500
+
+    refresh_unread_counter(user_id)
+
+    return jsonify({
+        "message": "Notifications updated successfully",
+        "updated": updated,
+        "broadcasts_updated": broadcasts_updated,
+        "unread_count": get_unread_count(user_id, get_user_timezone(user_id))
+    }), 200
+
 @notifications_bp.route("/<int:notification_id>", methods=['PATCH'])
 @token_required
 def update_notification(current_user, notification_id):
@@ -40,6 +241,7 @@ def update_notification(current_user, notification_id):
         return jsonify({"message": "Notification not found"}), 404
 
     data = request.json
+    was_read = bool(notification.is_read)
 
     # Update notification fields
     if "status" in data:
@@ -52,6 +254,14 @@ def update_notification(current_user, notification_id):
     # Commit changes
     try:
         db.session.commit()
+
+        # ✅ Keep the badge counter in step with the read flag
+        if bool(notification.is_read) != was_read:
+            if notification.is_read:
+                decrement_unread(user_id)
+            else:
+                increment_unread([user_id])
+
         return jsonify({
             "message": "Notification updated successfully",
             "notification": notification.to_dict()
@@ -59,3 +269,40 @@ def update_notification(current_user, notification_id):
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({"message": "Error updating notification", "error": str(e)}), 500
+
+@notifications_bp.route("/broadcast/<int:broadcast_id>", methods=['PATCH'])
+@token_required
+def update_broadcast_notification(current_user, broadcast_id):
+    user_id = current_user.get('user_id')
+
+    if not user_id:
+        return jsonify({"message": "User ID not found"}), 400
+
+    broadcast = BroadcastNotification.query.get(broadcast_id)
+
+    if not broadcast:
+        return jsonify({"message": "Notification not found"}), 404
+
+    data = request.json
+
+    # The state row is created the first time this user touches the broadcast
+    state = BroadcastNotificationState.query.filter_by(broadcast_id=broadcast_id, user_id=user_id).first()
+    if not state:
+        state = BroadcastNotificationState(broadcast_id=broadcast_id, user_id=user_id, is_read=False, dismissed=False)
+        db.session.add(state)
+
+    if "is_read" in data:
+        state.is_read = data["is_read"]
+    if "dismissed" in data:
+        state.dismissed = data["dismissed"]
+
+    try:
+        db.session.commit()
+        set_broadcast_read(user_id, broadcast, read=state.is_read or state.dismissed)
+        return jsonify({
+            "message": "Notification updated successfully",
+            "notification": broadcast.to_dict(user_id=user_id, state=state)
+        }), 200
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"message": "Error updating notification", "error": str(e)}), 500
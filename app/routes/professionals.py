@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
 from ..models import Professional, BountyPoints, RefreshToken
 from ..db import db
-from ..utils import token_required  
+from ..utils import token_required, issue_token
+from ..password_hashing import PasswordHashingBusy
 from sqlalchemy.exc import SQLAlchemyError
 from marshmallow import Schema, fields, validate
 from sqlalchemy import or_, and_
@@ -14,14 +14,8 @@ professional_bp = Blueprint('professional', __name__)
 ACCESS_TOKEN_EXPIRY = timedelta(days=7)
 REFRESH_TOKEN_EXPIRY = timedelta(days=90)
 
-def generate_jwt_token(user,role, expires_in):
-    payload = {
-        "user_id": user.id,
-        "user": user.to_dict(),
-        "role":role,
-        "exp": (datetime.utcnow() + expires_in).timestamp()
-    }
-    return jwt.encode(payload, current_app.config['JWT_SECRET_KEY'], algorithm='HS256')
+def generate_jwt_token(user,role, expires_in, refresh=False):
+    return issue_token(user.id, role, expires_in, refresh=refresh)
 
 @professional_bp.route('/professionals', methods=['POST'])
 def create_professional():
@@ -43,24 +37,21 @@ def create_professional():
         if existing_professional:
             return jsonify({"error": "A professional with this email or phone already exists."}), 409
 
-        # Hash the password
-        hashed_password = data['password']
-
         # Create a new professional
         professional = Professional(
             email=data.get('email'),
             phone=data.get('phone'),
-            hashed_password=hashed_password,
             type=data.get('role', 'professional'),  # Default to 'professional'
             sign_up_date=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
             user_status=1  # Default active status
         )
+        professional.set_password(data['password'])  # Hash the password
 
         db.session.add(professional)
         db.session.flush()  # Commit the professional creation
 
         token = generate_jwt_token(professional, professional.type, ACCESS_TOKEN_EXPIRY)
-        refresh_token = generate_jwt_token(professional, professional.type, REFRESH_TOKEN_EXPIRY)
+        refresh_token = generate_jwt_token(professional, professional.type, REFRESH_TOKEN_EXPIRY, refresh=True)
         RefreshToken.revoke_old_tokens(professional.id, "Professional")
         new_refresh_token = RefreshToken(user_id=professional.id, token=refresh_token, role="Professional")
         db.session.add(new_refresh_token)
@@ -71,6 +62,8 @@ def create_professional():
             "token": token,
             "refresh-token":refresh_token
         }), 201
+    except PasswordHashingBusy:
+        raise  # ✅ Answered with 503 by the app-wide handler
     except Exception as e:
         print(str(e))
         return jsonify({"error": str(e)}), 400
@@ -202,11 +195,11 @@ def signin():
     if role == "Psychologist" and user.type != "Psychologist":
         return jsonify({"message": "Unauthorized role for the user"}), 403
     # Check if the provided password is correct
-    if user.hashed_password != password:
+    if not user.check_password(password):
         return jsonify({"message": "Invalid password"}), 401
 
     token = generate_jwt_token(user, user.type, ACCESS_TOKEN_EXPIRY)
-    refresh_token = generate_jwt_token(user, user.type, REFRESH_TOKEN_EXPIRY)
+    refresh_token = generate_jwt_token(user, user.type, REFRESH_TOKEN_EXPIRY, refresh=True)
     RefreshToken.revoke_old_tokens(user.id, "Professional")
     new_refresh_token = RefreshToken(user_id=user.id, token=refresh_token, role="Professional")
     db.session.add(new_refresh_token)
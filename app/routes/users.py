@@ -8,6 +8,7 @@ from marshmallow import Schema, fields, validate
 from datetime import datetime
 from sqlalchemy.sql import func
 from collections import defaultdict
+from ..timezones import is_valid_timezone, cache_user_timezone
 
 user_bp = Blueprint('users', __name__)
 bounty_points_bp = Blueprint('bounty_points', __name__)
@@ -65,10 +66,18 @@ def update_user(current_user):
     user.user_gender = data.get("user_gender", user.user_gender)
     user.location = data.get("location", user.location)
     user.avatar = data.get("avatar", user.avatar)
-    user.hashed_password = data.get("password", user.hashed_password)
+    if data.get("password"):
+        user.set_password(data["password"])
+
+    # ✅ Campaigns are delivered in this zone's local time
+    if "timezone" in data:
+        if not is_valid_timezone(data["timezone"]):
+            return jsonify({"message": "Invalid timezone"}), 400
+        user.timezone = data["timezone"]
 
     try:
         db.session.commit()
+        cache_user_timezone(user.id, user.timezone)
 
         # Fetch associated wallet and bounty points
         bug_bounty_wallet = BugBountyWallet.query.filter_by(user_id=user.id).first()
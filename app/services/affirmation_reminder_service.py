@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from sqlalchemy import select, tuple_, literal, union_all, update, false
+from ..db import db
+from ..models import User, DailyAffirmation, PermanentAffirmation
+from ..models.affirmation import parse_reminder_minute
+from ..redis_config import redis_client
+from ..timezones import is_valid_timezone
+from .campaign_service import deliver_notifications
+
+# ✅ Last UTC minute (epoch // 60) whose reminders were dispatched
+LAST_MINUTE_KEY = "affirmations:reminders:last_minute"
+# ✅ "minute:table rank:affirmation id" of the last batch delivered in a minute not yet finished
+CURSOR_KEY = "affirmations:reminders:cursor"
+# Permanent affirmations are streamed before daily ones
+PERMANENT_RANK, DAILY_RANK = 0, 1
+# ✅ After an outage, reminders up to this many minutes late are still sent
+MAX_CATCH_UP_MINUTES = 10
+REMINDER_BATCH_SIZE = 1000
+BACKFILL_CHUNK_SIZE = 5000
+
+def _due_buckets(minute_start, timezones):
+    """(timezone, local minute of day, local date) for every zone at the UTC minute `minute_start`."""
+    buckets = []
+    for timezone in timezones:
+        local = minute_start.astimezone(ZoneInfo(timezone))
+        buckets.append((timezone, local.hour * 60 + local.minute, local.date().isoformat()))
+    return buckets
+
+def due_affirmation_reminders(buckets, after=None):
+    """One query for every active reminder due in `buckets`, across both affirmation tables.
+
+    The partial reminder_minute indexes narrow it to the due minutes; the join
+    keeps only users whose timezone is at that minute. Daily affirmations only
+    remind on their own date. Rows come ordered by (rank, affirmation id) so a
+    minute can resume `after` the last (rank, id) it delivered.
+    """
+    pairs = [(timezone, minute) for timezone, minute, _ in buckets]
+    minutes = {minute for _, minute in pairs}
+    daily_keys = [(timezone, minute, local_date) for timezone, minute, local_date in buckets]
+    after_rank, after_id = after or (PERMANENT_RANK, 0)
+
+    permanent = select(
+        PermanentAffirmation.user_id, PermanentAffirmation.affirmation_text,
+        literal(PERMANENT_RANK).label("rank"), PermanentAffirmation.id.label("affirmation_id")
+    ).join(User, User.id == PermanentAffirmation.user_id).where(
+        PermanentAffirmation.reminder_active == True,
+        PermanentAffirmation.reminder_minute.in_(minutes),
+        tuple_(User.timezone, PermanentAffirmation.reminder_minute).in_(pairs),
+        PermanentAffirmation.id > after_id if after_rank == PERMANENT_RANK else false()
+    )
+    daily = select(
+        DailyAffirmation.user_id, DailyAffirmation.affirmation_text,
+        literal(DAILY_RANK).label("rank"), DailyAffirmation.id.label("affirmation_id")
+    ).join(User, User.id == DailyAffirmation.user_id).where(
+        DailyAffirmation.reminder_active == True,
+        DailyAffirmation.reminder_minute.in_(minutes),
+        tuple_(User.timezone, DailyAffirmation.reminder_minute, DailyAffirmation.date).in_(daily_keys),
+        DailyAffirmation.id > (after_id if after_rank == DAILY_RANK else 0)
+    )
+    return union_all(permanent, daily).order_by("rank", "affirmation_id")
+
+def _reminder_row(user_id, affirmation_text, now):
+    return {
+        "title": "Affirmation Reminder 💫",
+        "description": affirmation_text,
+        "navigation": "/affirmations",
+        "body": affirmation_text,
+        "image": "",
+        "type": "affirmation_reminder",
+        "service": "Affirmation Reminder",
+        "live_until": now + timedelta(hours=1),
+        "user_id": user_id,
+    }
+
+def dispatch_affirmation_reminders(now=None, batch_size=REMINDER_BATCH_SIZE):
+    """Send the affirmation reminders due since the last run, one minute bucket at a time.
+
+    Called once a minute. The last dispatched minute is kept in Redis so a
+    repeated tick never sends twice and a late one catches up (at most
+    MAX_CATCH_UP_MINUTES); within a minute, a cursor saved after each
+    delivered batch lets a retry skip the batches already sent. Due rows are
+    streamed and delivered in batches through the notification pipeline.
+    Returns reminders sent.
+    """
+    now = now or datetime.now(ZoneInfo("UTC"))
+    current_minute = int(now.timestamp() // 60)
+    last_minute = redis_client.get(LAST_MINUTE_KEY)
+    first_minute = max(int(last_minute) + 1, current_minute - MAX_CATCH_UP_MINUTES + 1) if last_minute else current_minute
+
+    timezones = [
+        timezone for timezone in db.session.execute(select(User.timezone).distinct()).scalars()
+        if is_valid_timezone(timezone)
+    ]
+
+    # ✅ A minute that failed part way resumes after its last delivered batch
+    cursor = redis_client.get(CURSOR_KEY)
+    cursor_minute, cursor_rank, cursor_id = (int(part) for part in cursor.split(":")) if cursor else (None, None, None)
+
+    sent = 0
+    for minute in range(first_minute, current_minute + 1):
+        minute_start = datetime.fromtimestamp(minute * 60, ZoneInfo("UTC"))
+        after = (cursor_rank, cursor_id) if minute == cursor_minute else None
+        if timezones:
+            with db.engine.connect() as connection:
+                result = connection.execution_options(yield_per=batch_size).execute(
+                    due_affirmation_reminders(_due_buckets(minute_start, timezones), after=after)
+                )
+                for batch in result.partitions():
+                    sent += deliver_notifications([
+                        _reminder_row(user_id, affirmation_text, datetime.utcnow())
+                        for user_id, affirmation_text, _, _ in batch
+                    ], due_at=minute_start.replace(tzinfo=None))
+                    _, _, last_rank, last_id = batch[-1]
+                    redis_client.set(CURSOR_KEY, f"{minute}:{last_rank}:{last_id}")
+        pipe = redis_client.pipeline()
+        pipe.set(LAST_MINUTE_KEY, minute)
+        pipe.delete(CURSOR_KEY)
+        pipe.execute()
+
+    if sent:
+        print(f"💫 Sent {sent} affirmation reminders.")
+    return sent
+
+def backfill_reminder_minutes(chunk_size=BACKFILL_CHUNK_SIZE):
+    """Fill reminder_minute for rows written before the column existed. Returns rows updated."""
+    updated = 0
+    for model in (PermanentAffirmation, DailyAffirmation):
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, model.reminder_time).where(
+                    model.id > last_id,
+                    model.reminder_time.isnot(None),
+                    model.reminder_minute.is_(None)
+                ).order_by(model.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            values = [
+                {"id": row_id, "reminder_minute": parse_reminder_minute(reminder_time)}
+                for row_id, reminder_time in rows
+            ]
+            values = [value for value in values if value["reminder_minute"] is not None]
+            if values:
+                db.session.execute(update(model), values)
+            db.session.commit()
+            updated += len(values)
+            last_id = rows[-1][0]
+    return updated
@@ -0,0 +1,106 @@
+from datetime import datetime
+from random import choice
+from sqlalchemy import insert, select
+from ..db import db
+from ..models import Notifications, User, NotificationOutbox
+from ..presence import online_user_ids
+from .unread_counter_service import increment_unread
+from .outbox_service import outbox_row
+
+# ✅ Users handled per insert/commit/presence round trip
+CAMPAIGN_CHUNK_SIZE = 1000
+
+def all_users():
+    """Default audience: every user id, in id order."""
+    return select(User.id).order_by(User.id)
+
+def deliver_notifications(rows, due_at=None):
+    """Insert notification rows and queue pushes for the online users among them.
+
+    `rows` are column values (title, description, type, ..., user_id) that may
+    differ per row; `due_at` (naive UTC) is when they were meant to go out and
+    defaults to now. One presence lookup, one INSERT ... RETURNING and one
+    outbox INSERT, committed together. Returns rows inserted.
+    """
+    online = online_user_ids({row["user_id"] for row in rows})
+    created_at = datetime.utcnow()
+
+    # ✅ Online users get the push now; the rest stay pending for send_scheduled_notifications
+    rows = [
+        dict(row, status="sent" if row["user_id"] in online else "pending", is_read=False, created_at=created_at)
+        for row in rows
+    ]
+    notification_ids = db.session.execute(
+        insert(Notifications).returning(Notifications.id, sort_by_parameter_order=True),
+        rows
+    ).scalars().all()
+
+    # ✅ Outbox entries commit with the chunk; the delivery worker does the emitting
+    pushes = [
+        outbox_row(
+            dict(row, id=notification_id, status="sent",
+                 created_at=created_at.isoformat(),
+                 live_until=row["live_until"].isoformat() if row.get("live_until") else None),
+            user_id=row["user_id"],
+            notification_id=notification_id,
+            available_at=due_at
+        )
+        for notification_id, row in zip(notification_ids, rows) if row["user_id"] in online
+    ]
+    if pushes:
+        db.session.execute(insert(NotificationOutbox), pushes)
+    db.session.commit()
+
+    increment_unread([row["user_id"] for row in rows])
+    return len(notification_ids)
+
+def _deliver_chunk(user_ids, fields):
+    """Insert one chunk of a campaign and queue pushes for its online users. Returns rows inserted."""
+    return deliver_notifications([dict(fields, user_id=uid) for uid in user_ids])
+
+def run_campaign(
+    title,
+    messages,
+    type,
+    service,
+    audience=None,
+    navigation="",
+    body="",
+    image="",
+    live_until=None,
+    chunk_size=CAMPAIGN_CHUNK_SIZE
+):
+    """Send one nudge to every user id returned by `audience`.
+
+    `messages` is a pool to pick this run's text from (or a single string) and
+    `audience` is a select of user ids (defaults to all users). Ids are streamed
+    with `yield_per` on a dedicated connection while each chunk is inserted and
+    committed, with outbox entries for its online users, on the session.
+    Returns the number of notifications written.
+    """
+    description = choice(messages) if isinstance(messages, (list, tuple)) else messages
+    fields = {
+        "title": title,
+        "description": description,
+        "navigation": navigation,
+        "body": body,
+        "image": image,
+        "type": type,
+        "service": service,
+        "live_until": live_until or datetime.utcnow(),
+    }
+    statement = audience if audience is not None else all_users()
+
+    sent = 0
+    try:
+        with db.engine.connect() as connection:
+            result = connection.execution_options(yield_per=chunk_size).execute(statement)
+            for chunk in result.scalars().partitions():
+                sent += _deliver_chunk(list(chunk), fields)
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Campaign '{title}' stopped after {sent} notifications: {str(e)}")
+        raise
+
+    print(f"📢 Campaign '{title}' sent to {sent} users.")
+    return sent
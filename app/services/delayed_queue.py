@@ -0,0 +1,100 @@
+import json
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from ..db import db
+from ..models import NotificationOutbox
+from ..redis_config import redis_client
+from .outbox_service import outbox_row
+
+# ✅ Sorted set of job id -> due timestamp; payloads live in a hash beside it
+QUEUE_KEY = "delayed:notifications"
+PROCESSING_KEY = "delayed:notifications:processing"
+PAYLOADS_KEY = "delayed:notifications:payloads"
+
+DELAYED_BATCH_SIZE = 500
+# ✅ Claimed jobs not acknowledged within this window are put back (poller crashed mid-batch)
+PROCESSING_TIMEOUT_SECONDS = 120
+
+# Move up to ARGV[2] due jobs into the processing set, stamped with the claim time
+_CLAIM_SCRIPT = """
+local ids = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(ids) do
+    redis.call('zrem', KEYS[1], id)
+    redis.call('zadd', KEYS[2], ARGV[1], id)
+end
+return ids
+"""
+# Put jobs claimed before ARGV[1] back into the queue, due immediately
+_REQUEUE_SCRIPT = """
+local ids = redis.call('zrangebyscore', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(ids) do
+    redis.call('zrem', KEYS[2], id)
+    redis.call('zadd', KEYS[1], ARGV[2], id)
+end
+return #ids
+"""
+
+_claim = redis_client.register_script(_CLAIM_SCRIPT)
+_requeue = redis_client.register_script(_REQUEUE_SCRIPT)
+
+def schedule_delivery(job_id, run_at, payload, user_id=None, notification_id=None):
+    """Queue a real-time push for `run_at`. Re-using a `job_id` replaces the earlier schedule."""
+    entry = json.dumps({
+        "payload": payload, "user_id": user_id, "notification_id": notification_id, "due_at": run_at.timestamp()
+    })
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(PAYLOADS_KEY, job_id, entry)
+    pipe.zadd(QUEUE_KEY, {job_id: run_at.timestamp()})
+    pipe.execute()
+
+def cancel_delivery(job_id):
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.zrem(QUEUE_KEY, job_id)
+    pipe.hdel(PAYLOADS_KEY, job_id)
+    pipe.execute()
+
+def pending_deliveries():
+    return redis_client.zcard(QUEUE_KEY)
+
+def dispatch_due_deliveries(batch_size=DELAYED_BATCH_SIZE):
+    """Move every due job into the notification outbox, one atomic claim per batch.
+
+    Jobs are popped with a Lua script (so two pollers never claim the same job),
+    written to the outbox in one INSERT and only then acknowledged; anything
+    claimed but never acknowledged is re-queued after PROCESSING_TIMEOUT_SECONDS.
+    Returns the number of jobs handed to the outbox.
+    """
+    now = time.time()
+    _requeue(keys=[QUEUE_KEY, PROCESSING_KEY], args=[now - PROCESSING_TIMEOUT_SECONDS, now])
+
+    dispatched = 0
+    while True:
+        job_ids = _claim(keys=[QUEUE_KEY, PROCESSING_KEY], args=[now, batch_size])
+        if not job_ids:
+            break
+
+        entries = [json.loads(entry) for entry in redis_client.hmget(PAYLOADS_KEY, job_ids) if entry]
+        if entries:
+            db.session.execute(insert(NotificationOutbox), [
+                outbox_row(
+                    entry["payload"], user_id=entry["user_id"], notification_id=entry["notification_id"],
+                    # ✅ Stamp the original due time so outbox lag includes time spent in this queue
+                    available_at=datetime.utcfromtimestamp(entry["due_at"]) if entry.get("due_at") else None
+                )
+                for entry in entries
+            ])
+            db.session.commit()
+
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zrem(PROCESSING_KEY, *job_ids)
+        pipe.hdel(PAYLOADS_KEY, *job_ids)
+        pipe.execute()
+
+        dispatched += len(entries)
+        if len(job_ids) < batch_size:
+            break
+
+    if dispatched:
+        print(f"⏰ Dispatched {dispatched} delayed notifications.")
+    return dispatched
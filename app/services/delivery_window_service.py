@@ -0,0 +1,173 @@
+import math
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+from sqlalchemy import select, func
+from ..config import Config
+from ..db import db
+from ..models import User
+from ..redis_config import redis_client
+from ..timezones import is_valid_timezone
+from .leader_election import leader_elector
+from .notification_service import (
+    affirmationdaily,
+    generate_checkin_nudges,
+    generate_morning_notifications,
+    generate_afternoon_notifications,
+    generate_evening_notifications,
+    generate_monthly_recheck_reminders,
+    generate_fun_nudges,
+    generate_goal_setting_nudge,
+    generate_journaling_nudge,
+    generate_vision_board_nudge,
+    generate_mindfulness_nudge,
+    generate_inactivity_nudges
+)
+
+# ✅ Progress of one campaign in one timezone on one local date
+PROGRESS_KEY = "campaign:{}:{}:{}"
+PROGRESS_TTL_SECONDS = 2 * 24 * 3600
+
+def _weekdays(*days):
+    return lambda local_date: local_date.strftime("%a").lower() in days
+
+def _day_of_month(day):
+    return lambda local_date: local_date.day == day
+
+def _odd_days(local_date):
+    # Same days as the old CronTrigger(day="*/2"): 1st, 3rd, 5th, ...
+    return local_date.day % 2 == 1
+
+def _iso_week(local_date):
+    year, week, _ = local_date.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def _shared_weekday(name, options):
+    """One weekday out of `options`, picked afresh each ISO week and shared by every process."""
+    return lambda local_date: local_date.strftime("%a").lower() == leader_elector.shared_choice(
+        name, options, period=_iso_week(local_date)
+    )
+
+# ✅ Every timed campaign, in the user's local time. "broadcast" campaigns store
+# one row per timezone when the window opens; the others write one row per
+# user, spread evenly over `minutes`.
+CAMPAIGN_WINDOWS = [
+    {"id": "morning_affirmation", "start": time(7, 0), "minutes": 15, "send": lambda audience: affirmationdaily("morning", audience=audience)},
+    {"id": "morning_journaling", "start": time(7, 15), "minutes": 15, "days": _odd_days, "send": lambda audience: generate_journaling_nudge("morning", audience=audience)},
+    {"id": "morning_notifications", "start": time(7, 30), "minutes": 60, "broadcast": True, "send": generate_morning_notifications},
+    {"id": "morning_mindfulness", "start": time(8, 30), "minutes": 30, "send": lambda audience: generate_mindfulness_nudge("morning", audience=audience)},
+    {"id": "morning_checkin", "start": time(9, 30), "minutes": 30, "send": lambda audience: generate_checkin_nudges("morning", audience=audience)},
+    {"id": "vision_board", "start": time(11, 0), "minutes": 60, "days": _weekdays("sat"), "send": generate_vision_board_nudge},
+    {"id": "afternoon_notifications", "start": time(12, 0), "minutes": 90, "broadcast": True, "days": _weekdays("mon", "wed", "fri"), "send": generate_afternoon_notifications},
+    {"id": "fun_nudges", "start": time(14, 0), "minutes": 60, "days": _shared_weekday("fun_nudges_day", ["sat", "sun"]), "send": generate_fun_nudges},
+    {"id": "afternoon_mindfulness", "start": time(14, 30), "minutes": 30, "send": lambda audience: generate_mindfulness_nudge("afternoon", audience=audience)},
+    {"id": "afternoon_affirmation", "start": time(15, 0), "minutes": 30, "send": lambda audience: affirmationdaily("afternoon", audience=audience)},
+    {"id": "goal_setting", "start": time(18, 0), "minutes": 60, "days": _weekdays("sun"), "send": generate_goal_setting_nudge},
+    {"id": "inactivity_nudges", "start": time(18, 0), "minutes": 60, "days": _shared_weekday("inactivity_nudges_day", ["tue", "thu"]), "send": generate_inactivity_nudges},
+    {"id": "evening_notifications", "start": time(19, 0), "minutes": 120, "broadcast": True, "days": _weekdays("tue", "thu", "sat", "sun"), "send": generate_evening_notifications},
+    {"id": "monthly_recheck_reminder", "start": time(19, 30), "minutes": 60, "days": _day_of_month(1), "send": generate_monthly_recheck_reminders},
+    {"id": "evening_checkin", "start": time(20, 30), "minutes": 30, "send": lambda audience: generate_checkin_nudges("evening", audience=audience)},
+    {"id": "evening_journaling", "start": time(21, 0), "minutes": 30, "days": _odd_days, "send": lambda audience: generate_journaling_nudge("evening", audience=audience)},
+]
+
+def user_timezones():
+    """Every timezone that has at least one user (served by the index on users.timezone)."""
+    return db.session.execute(select(User.timezone).distinct()).scalars().all()
+
+def _send_slice(campaign, timezone, progress_key, progress, minute, budget):
+    """Send the part of a per-user campaign that is due by `minute` of its window. Returns rows written."""
+    if "total" not in progress:
+        total = db.session.execute(
+            select(func.count()).select_from(User).where(User.timezone == timezone)
+        ).scalar()
+        progress = {"total": total, "sent": 0, "last_id": 0}
+        redis_client.hset(progress_key, mapping=progress)
+        redis_client.expire(progress_key, PROGRESS_TTL_SECONDS)
+
+    total, sent, last_id = int(progress["total"]), int(progress["sent"]), int(progress["last_id"])
+
+    # ✅ Even pace: by the end of minute m, (m + 1) / minutes of the zone has been sent.
+    # Past the window the target is everything, so slices the rate limit held back still go out.
+    target = math.ceil(total * min(minute + 1, campaign["minutes"]) / campaign["minutes"])
+    limit = min(target - sent, budget)
+    if limit <= 0:
+        return 0
+
+    user_ids = db.session.execute(
+        select(User.id).where(User.timezone == timezone, User.id > last_id).order_by(User.id).limit(limit)
+    ).scalars().all()
+    if not user_ids:
+        redis_client.hset(progress_key, "done", 1)
+        return 0
+
+    audience = select(User.id).where(
+        User.timezone == timezone, User.id > last_id, User.id <= user_ids[-1]
+    ).order_by(User.id)
+    written = campaign["send"](audience)
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(progress_key, mapping={"last_id": user_ids[-1]})
+    pipe.hincrby(progress_key, "sent", len(user_ids))
+    if len(user_ids) < limit or sent + len(user_ids) >= total:
+        pipe.hset(progress_key, "done", 1)
+    pipe.execute()
+    return written or 0
+
+def dispatch_campaign_windows(now=None, rate_per_minute=None):
+    """Run every campaign whose local window is open in some user timezone.
+
+    Called once a minute. Each (campaign, timezone, local date) keeps its
+    progress in a Redis hash, so a tick only sends the next evenly paced slice
+    of that zone's users, and all campaigns together write at most
+    `rate_per_minute` notifications per tick. Broadcasts are created once per
+    timezone when their window opens. A window that opens while the dispatcher
+    is down is picked up late but never past its end; a slice held back by the
+    rate limit is finished after the window closes. Returns rows written;
+    raises after the loop if any campaign failed.
+    """
+    now = now or datetime.now(ZoneInfo("UTC"))
+    budget = rate_per_minute if rate_per_minute is not None else Config.CAMPAIGN_RATE_PER_MINUTE
+    written = 0
+    failed = []
+
+    for timezone in user_timezones():
+        if not is_valid_timezone(timezone):
+            print(f"⚠️ Skipping campaigns for unknown timezone {timezone!r}")
+            continue
+        local_now = now.astimezone(ZoneInfo(timezone))
+
+        for campaign in CAMPAIGN_WINDOWS:
+            window_start = datetime.combine(local_now.date(), campaign["start"], tzinfo=local_now.tzinfo)
+            if local_now < window_start:
+                continue
+            minute = int((local_now - window_start).total_seconds() // 60)
+
+            progress_key = PROGRESS_KEY.format(campaign["id"], timezone, local_now.date().isoformat())
+            progress = redis_client.hgetall(progress_key)
+            if progress.get("done"):
+                continue
+            if not progress and minute >= campaign["minutes"]:
+                continue  # Window missed entirely; don't send "good morning" at noon
+            if "days" in campaign and not campaign["days"](local_now.date()):
+                continue
+
+            try:
+                if campaign.get("broadcast"):
+                    campaign["send"](timezone=timezone)
+                    redis_client.hset(progress_key, mapping={"done": 1, "sent": 1})
+                    redis_client.expire(progress_key, PROGRESS_TTL_SECONDS)
+                    written += 1
+                elif budget > 0:
+                    sent = _send_slice(campaign, timezone, progress_key, progress, minute, budget)
+                    budget -= sent
+                    written += sent
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Campaign {campaign['id']} failed for {timezone}: {str(e)}")
+                failed.append(f"{campaign['id']}@{timezone}")
+
+    if written:
+        print(f"🕒 Campaign windows wrote {written} notifications.")
+    # ✅ Other campaigns still ran; fail the tick so the job history shows it
+    if failed:
+        raise RuntimeError(f"Campaign windows failed: {', '.join(failed)}")
+    return written
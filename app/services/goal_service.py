@@ -1,50 +1,156 @@
 from flask import current_app
 from datetime import datetime
+from sqlalchemy import update, select
 from ..models import Goals
+from ..models.goals import CLOSED_FOR_COMPLETION, CLOSED_FOR_START
 from ..db import db
+from ..redis_config import redis_client
 
-def update_goal_status_automatically():
+# ✅ Sorted set of goal id -> timestamp of its next automatic status change
+GOAL_TRANSITIONS_KEY = "goals:transitions"
+GOAL_TIMER_BATCH_SIZE = 500
+GOAL_REBUILD_CHUNK_SIZE = 5000
+
+# Pop up to ARGV[2] goal ids due at or before ARGV[1], as a flat [id, score, id, score, ...] list
+_POP_DUE_SCRIPT = """
+local due = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+for i = 1, #due, 2 do
+    redis.call('zrem', KEYS[1], due[i])
+end
+return due
+"""
+_pop_due = redis_client.register_script(_POP_DUE_SCRIPT)
+
+def next_transition_at(goal):
+    """When `goal` next changes status on its own (Started, then Completed), or None."""
+    candidates = []
+    if goal.status not in CLOSED_FOR_START and goal.start_date and goal.start_time:
+        candidates.append(datetime.combine(goal.start_date, goal.start_time))
+    if goal.status not in CLOSED_FOR_COMPLETION and goal.end_date and goal.end_time:
+        candidates.append(datetime.combine(goal.end_date, goal.end_time))
+    return min(candidates) if candidates else None
+
+def schedule_goal_transitions(goals):
+    """Put each goal's next transition in the timer index, or remove goals that have none."""
+    pipe = redis_client.pipeline(transaction=False)
+    for goal in goals:
+        due_at = next_transition_at(goal)
+        if due_at:
+            pipe.zadd(GOAL_TRANSITIONS_KEY, {goal.id: due_at.timestamp()})
+        else:
+            pipe.zrem(GOAL_TRANSITIONS_KEY, goal.id)
+    pipe.execute()
+
+def unschedule_goal_transition(goal_id):
+    redis_client.zrem(GOAL_TRANSITIONS_KEY, goal_id)
+
+def _apply_transitions(current_time, goal_ids=None):
+    """The two status UPDATEs, optionally limited to `goal_ids`. Returns (completed ids, started ids)."""
+    scope = [Goals.id.in_(goal_ids)] if goal_ids is not None else []
+
+    completed = db.session.execute(
+        update(Goals).where(
+            *scope,
+            Goals.status.notin_(CLOSED_FOR_COMPLETION),
+            Goals.end_date + Goals.end_time <= current_time
+        ).values(status='Completed').returning(Goals.id),
+        execution_options={"synchronize_session": False}
+    ).scalars().all()
+
+    # ✅ Runs after the completion update so a goal that already ended is never marked Started
+    started = db.session.execute(
+        update(Goals).where(
+            *scope,
+            Goals.status.notin_(CLOSED_FOR_START),
+            Goals.start_date + Goals.start_time <= current_time
+        ).values(status='Started').returning(Goals.id),
+        execution_options={"synchronize_session": False}
+    ).scalars().all()
+
+    db.session.commit()
+    return completed, started
+
+def fire_due_goal_transitions(batch_size=GOAL_TIMER_BATCH_SIZE):
+    """Apply the transitions that are due according to the timer index.
+
+    Due ids are popped atomically, updated with the same statements as the
+    sweep (limited to those ids) and re-indexed with their next transition, so
+    the work follows the goals that change rather than the goals that exist.
+    If a batch fails its ids go back in the index to be retried on the next
+    tick. Returns the counts changed.
+    """
+    completed_count, started_count = 0, 0
+    popped = {}
     try:
-        # Ensure the function runs within the app context
-        with current_app.app_context():
+        while True:
             current_time = datetime.now()
+            due = _pop_due(keys=[GOAL_TRANSITIONS_KEY], args=[current_time.timestamp(), batch_size])
+            popped = {due[i]: float(due[i + 1]) for i in range(0, len(due), 2)}
+            goal_ids = [int(goal_id) for goal_id in popped]
+            if not goal_ids:
+                break
 
-            # Fetch goals where the status is not 'Cancelled'
-            goals = Goals.query.filter(Goals.status != 'Cancelled').all()
+            completed, started = _apply_transitions(current_time, goal_ids)
+            completed_count += len(completed)
+            started_count += len(started)
 
-            for goal in goals:
-                print(f"Checking goal {goal.id}, current status: {goal.status}")
+            # Started goals now wait for their end; edited goals get their new time back
+            schedule_goal_transitions(Goals.query.filter(Goals.id.in_(goal_ids)).all())
 
-                if goal.end_date and goal.end_time:
-                    goal_end_datetime = datetime.combine(goal.end_date, goal.end_time)
+            popped = {}
+            if len(goal_ids) < batch_size:
+                break
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error firing goal transitions: {str(e)}")
+        # ✅ Put the batch back; NX keeps any newer time an edit scheduled meanwhile
+        if popped:
+            redis_client.zadd(GOAL_TRANSITIONS_KEY, popped, nx=True)
+        raise
 
-                    print(f"Goal end datetime: {goal_end_datetime}, current time: {current_time}")
+    if completed_count or started_count:
+        print(f"⏱️ Goal timers: {completed_count} completed, {started_count} started.")
+    return {"completed": completed_count, "started": started_count}
 
-                    if goal_end_datetime <= current_time:
-                        if goal.status != 'Completed':
-                            print(f"Updating goal {goal.id} to 'Completed'.")
-                            goal.status = 'Completed'
-                            db.session.commit()  # Commit changes to the database
-                            print(f"Goal {goal.id} status updated to Completed.")
-                        else:
-                            print(f"Goal {goal.id} already marked as 'Completed'.")
-                else:
-                    print(f"Goal {goal.id} doesn't have valid end date/time.")
+def rebuild_goal_transition_index(chunk_size=GOAL_REBUILD_CHUNK_SIZE):
+    """Index every open goal, e.g. after a deploy or lost Redis state. Returns goals indexed."""
+    indexed = 0
+    last_id = 0
+    while True:
+        goals = db.session.execute(
+            select(Goals).where(
+                Goals.id > last_id,
+                Goals.status.notin_(CLOSED_FOR_COMPLETION)
+            ).order_by(Goals.id).limit(chunk_size)
+        ).scalars().all()
+        if not goals:
+            break
+        schedule_goal_transitions(goals)
+        indexed += len(goals)
+        last_id = goals[-1].id
+        db.session.expunge_all()
+    print(f"⏱️ Indexed transitions for {indexed} open goals.")
+    return indexed
 
-                # Only attempt to update the status to "Started" if it's not "Completed"
-                if goal.status != 'Completed' and goal.status != 'Started' and goal.start_time:
-                    if goal.start_date:
-                        goal_start_datetime = datetime.combine(goal.start_date, goal.start_time)
+def update_goal_status_automatically():
+    """Safety net for the goal timers: move every due goal to Completed, then Started.
 
-                        print(f"Goal start datetime: {goal_start_datetime}, current time: {current_time}")
+    One UPDATE each, served by the partial indexes on open goals, so the cost
+    follows the number of due goals rather than the table size. Goals it
+    changes are re-indexed for their next transition. Returns the counts
+    changed.
+    """
+    try:
+        # Ensure the function runs within the app context
+        with current_app.app_context():
+            completed, started = _apply_transitions(datetime.now())
 
-                        if goal_start_datetime <= current_time:
-                            print(f"Updating goal {goal.id} to 'Started'.")
-                            goal.status = 'Started'
-                            db.session.commit()  # Commit changes to the database
-                            print(f"Goal {goal.id} status updated to Started.")
-                        else:
-                            print(f"Goal {goal.id} is not yet started.")
+            if completed or started:
+                schedule_goal_transitions(Goals.query.filter(Goals.id.in_(completed + started)).all())
+                print(f"🎯 Goals updated: {len(completed)} completed, {len(started)} started.")
+            return {"completed": len(completed), "started": len(started)}
 
     except Exception as e:
+        db.session.rollback()
         print(f"Error updating goal statuses: {str(e)}")
+        raise
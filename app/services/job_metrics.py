@@ -0,0 +1,166 @@
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from ..db import db
+from ..models import JobRun
+from ..redis_config import redis_client
+
+# ✅ One hash per job so the admin endpoint sees runs from whichever process leads
+JOB_METRICS_KEY = "scheduler:jobs:{}"
+JOB_IDS_KEY = "scheduler:jobs"
+# ✅ Due-to-delivery lag per notification type
+DISPATCH_LAG_KEY = "dispatch:lag:{}"
+DISPATCH_LAG_TYPES_KEY = "dispatch:lag"
+
+# Fold one batch of lag samples into a type's stats, keeping the running maximum
+_RECORD_LAG_SCRIPT = """
+redis.call('hincrby', KEYS[1], 'count', ARGV[1])
+redis.call('hincrby', KEYS[1], 'total_ms', ARGV[2])
+redis.call('hset', KEYS[1], 'last_ms', ARGV[4])
+local peak = tonumber(redis.call('hget', KEYS[1], 'max_ms') or '-1')
+if tonumber(ARGV[3]) > peak then
+    redis.call('hset', KEYS[1], 'max_ms', ARGV[3])
+end
+"""
+_record_lag = redis_client.register_script(_RECORD_LAG_SCRIPT)
+
+# ✅ Runs that wrote nothing, did not fail and finished faster than this are not kept in job_runs
+SLOW_RUN_SECONDS = 1.0
+JOB_RUN_RETENTION = timedelta(days=7)
+
+# ✅ Totals for the jobs this process has run since it started
+_process_stats = {}
+_process_stats_lock = threading.Lock()
+
+def _as_count(rows):
+    if isinstance(rows, dict):
+        rows = sum(count for count in rows.values() if isinstance(count, int))  # e.g. {"completed": 3, "started": 5}
+    return rows if isinstance(rows, int) and not isinstance(rows, bool) else None
+
+def record_job_run(job_id, started_at, duration, rows=None, error=None, collector=None, host=None):
+    """Store the outcome of one run in Redis, this process's totals and (if it did anything) job_runs.
+
+    `rows` is the job's return value when it is a count (or a dict of counts);
+    `collector` carries the database time and Redis round trips it spent.
+    Must run inside an app context.
+    """
+    rows = _as_count(rows)
+    db_time_ms = int(collector.db_time * 1000) if collector else 0
+    db_statements = collector.db_statements if collector else 0
+    redis_round_trips = collector.redis_round_trips if collector else 0
+    duration_ms = int(duration * 1000)
+
+    with _process_stats_lock:
+        stats = _process_stats.setdefault(job_id, {
+            "runs": 0, "failures": 0, "rows": 0, "duration_ms": 0, "db_time_ms": 0, "redis_round_trips": 0, "max_duration_ms": 0
+        })
+        stats["runs"] += 1
+        stats["failures"] += 1 if error else 0
+        stats["rows"] += rows or 0
+        stats["duration_ms"] += duration_ms
+        stats["db_time_ms"] += db_time_ms
+        stats["redis_round_trips"] += redis_round_trips
+        stats["max_duration_ms"] = max(stats["max_duration_ms"], duration_ms)
+        stats["last_run_at"] = started_at.isoformat()
+
+    key = JOB_METRICS_KEY.format(job_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.sadd(JOB_IDS_KEY, job_id)
+    pipe.hset(key, mapping={
+        "last_run_at": started_at.isoformat(),
+        "last_duration_ms": duration_ms,
+        "last_db_time_ms": db_time_ms,
+        "last_db_statements": db_statements,
+        "last_redis_round_trips": redis_round_trips,
+        "last_status": "failed" if error else "ok",
+    })
+    pipe.hincrby(key, "runs", 1)
+    if rows is not None:
+        pipe.hset(key, "last_rows", rows)
+        pipe.hincrby(key, "total_rows", rows)
+    if error:
+        pipe.hincrby(key, "failures", 1)
+        pipe.hset(key, mapping={"last_error": str(error)[:500], "last_failure_at": started_at.isoformat()})
+    pipe.execute()
+
+    if rows or error or duration >= SLOW_RUN_SECONDS:
+        if error:
+            db.session.rollback()
+        db.session.add(JobRun(
+            job_id=job_id,
+            started_at=started_at,
+            finished_at=started_at + timedelta(seconds=duration),
+            duration_ms=duration_ms,
+            rows=rows,
+            db_time_ms=db_time_ms,
+            db_statements=db_statements,
+            redis_round_trips=redis_round_trips,
+            status="failed" if error else "ok",
+            error=str(error) if error else None,
+            host=host
+        ))
+        db.session.commit()
+
+def record_job_missed(job_id, scheduled_run_time):
+    """Count a run APScheduler skipped because it was past its misfire grace time."""
+    key = JOB_METRICS_KEY.format(job_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.sadd(JOB_IDS_KEY, job_id)
+    pipe.hincrby(key, "misses", 1)
+    pipe.hset(key, "last_missed_at", (scheduled_run_time or datetime.utcnow()).isoformat())
+    pipe.execute()
+
+def get_job_metrics(job_ids=None):
+    """Metrics for `job_ids` (default: every job that has ever reported), keyed by job id."""
+    job_ids = sorted(job_ids if job_ids is not None else redis_client.smembers(JOB_IDS_KEY))
+    pipe = redis_client.pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.hgetall(JOB_METRICS_KEY.format(job_id))
+    return dict(zip(job_ids, pipe.execute()))
+
+def get_process_job_stats():
+    with _process_stats_lock:
+        return {job_id: dict(stats) for job_id, stats in _process_stats.items()}
+
+def record_dispatch_lag(lags):
+    """Add (notification type, seconds between due and delivered) samples to the lag stats."""
+    batches = {}
+    for notification_type, seconds in lags:
+        lag_ms = max(int(seconds * 1000), 0)
+        count, total, peak, _ = batches.get(notification_type or "unknown", (0, 0, 0, 0))
+        batches[notification_type or "unknown"] = (count + 1, total + lag_ms, max(peak, lag_ms), lag_ms)
+    if not batches:
+        return
+
+    pipe = redis_client.pipeline(transaction=False)
+    for notification_type, (count, total, peak, last) in batches.items():
+        pipe.sadd(DISPATCH_LAG_TYPES_KEY, notification_type)
+        _record_lag(keys=[DISPATCH_LAG_KEY.format(notification_type)], args=[count, total, peak, last], client=pipe)
+    pipe.execute()
+
+def get_dispatch_lag():
+    """Lag stats per notification type: count, average, max and last, in milliseconds."""
+    types = sorted(redis_client.smembers(DISPATCH_LAG_TYPES_KEY))
+    pipe = redis_client.pipeline(transaction=False)
+    for notification_type in types:
+        pipe.hgetall(DISPATCH_LAG_KEY.format(notification_type))
+    lag = {}
+    for notification_type, stats in zip(types, pipe.execute()):
+        count = int(stats.get("count", 0))
+        lag[notification_type] = {
+            "count": count,
+            "avg_ms": int(stats.get("total_ms", 0)) // count if count else None,
+            "max_ms": int(stats["max_ms"]) if "max_ms" in stats else None,
+            "last_ms": int(stats["last_ms"]) if "last_ms" in stats else None,
+        }
+    return lag
+
+def purge_job_runs(before=None):
+    """Delete job history older than JOB_RUN_RETENTION. Returns rows deleted."""
+    before = before or datetime.utcnow() - JOB_RUN_RETENTION
+    deleted = db.session.execute(
+        delete(JobRun).where(JobRun.started_at < before),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    db.session.commit()
+    return deleted
@@ -0,0 +1,129 @@
+import atexit
+import os
+import random
+import socket
+import threading
+import uuid
+from ..redis_config import redis_client
+
+# ✅ A single Redis key holds the lease; whoever owns it runs the cron jobs
+LEADER_KEY = "scheduler:leader"
+LEASE_TTL_SECONDS = 10
+HEARTBEAT_SECONDS = 3
+# ✅ Shared random picks outlive the week they are made for, then are drawn again
+SHARED_CHOICE_TTL_SECONDS = 8 * 24 * 3600
+
+# Extend / release the lease only while we still own it
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class LeaderElector:
+    """Redis-lease leader election across processes.
+
+    Every process runs a heartbeat thread that either renews the lease it
+    holds or tries to take a free one with SET NX PX. If the leader dies its
+    lease expires after LEASE_TTL_SECONDS and a standby takes over on its next
+    heartbeat. Any Redis error demotes this process, so at worst no one leads
+    for a moment; two leaders never run at once while Redis is reachable.
+    """
+
+    def __init__(self, key=LEADER_KEY, ttl=LEASE_TTL_SECONDS, interval=HEARTBEAT_SECONDS, client=None):
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.interval = interval
+        self.client = client or redis_client
+        self.identity = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._is_leader = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._acquire_callbacks = []
+        self._renew = self.client.register_script(_RENEW_SCRIPT)
+        self._release = self.client.register_script(_RELEASE_SCRIPT)
+
+    @property
+    def is_leader(self):
+        return self._is_leader
+
+    def heartbeat(self):
+        """Renew or try to acquire the lease once. Returns whether this process leads."""
+        try:
+            if self._is_leader and self._renew(keys=[self.key], args=[self.identity, self.ttl_ms]):
+                return True
+            acquired = self.client.set(self.key, self.identity, nx=True, px=self.ttl_ms)
+            if acquired:
+                # A fresh lease, also when ours vanished (e.g. Redis was flushed) and we took it back
+                print(f"👑 {self.identity} is now the scheduler leader.")
+            elif self._is_leader:
+                print(f"⚠️ {self.identity} lost the scheduler lease.")
+            self._is_leader = bool(acquired)
+        except Exception as e:
+            self._is_leader = False
+            print(f"❌ Leader heartbeat failed: {str(e)}")
+            return False
+        if acquired:
+            self._run_acquire_callbacks()
+        return self._is_leader
+
+    def on_acquire(self, callback):
+        """Call `callback` every time this process takes the lease (not on renewals)."""
+        self._acquire_callbacks.append(callback)
+
+    def _run_acquire_callbacks(self):
+        for callback in self._acquire_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Leader acquire callback failed: {str(e)}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.heartbeat()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader-heartbeat", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop heartbeating and hand the lease back so a standby takes over immediately."""
+        self._stop.set()
+        if self._is_leader:
+            try:
+                self._release(keys=[self.key], args=[self.identity])
+            except Exception:
+                pass
+        self._is_leader = False
+
+    def current_leader(self):
+        """Who holds the lease right now, as seen from this process."""
+        leader = self.client.get(self.key)
+        return {
+            "leader": leader,
+            "lease_ttl_ms": self.client.pttl(self.key) if leader else None,
+            "this_process": self.identity,
+            "is_leader": self._is_leader,
+        }
+
+    def shared_choice(self, name, options, period="", ttl=SHARED_CHOICE_TTL_SECONDS):
+        """Pick one of `options` once per `period` and reuse it in every process (e.g. a random
+        weekday each ISO week). The pick expires after `ttl`, so a new period gets a new one."""
+        key = f"scheduler:choice:{name}:{period}"
+        self.client.set(key, random.choice(options), nx=True, ex=ttl)
+        choice = self.client.get(key)
+        return choice if choice in options else options[0]
+
+leader_elector = LeaderElector()
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from ..db import db
+
+# ✅ Daily partitions are named notifications_pYYYYMMDD and cover [day, day + 1)
+PARTITION_PREFIX = "notifications_p"
+DEFAULT_PARTITION = "notifications_default"
+PARTITION_DAYS_AHEAD = 3
+
+# ✅ Rows removed per statement by the non-partitioned fallback
+RETENTION_DELETE_BATCH_SIZE = 5000
+
+def is_partitioned():
+    """True when `notifications` is a range-partitioned Postgres table."""
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('notifications')"
+    )).first() is not None
+
+def _partition_name(day):
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+def ensure_notification_partitions(days_ahead=PARTITION_DAYS_AHEAD):
+    """Create today's partition, the next `days_ahead` ones and the default catch-all."""
+    if not is_partitioned():
+        return 0
+
+    today = datetime.utcnow().date()
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(day)} PARTITION OF notifications "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        ))
+    db.session.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF notifications DEFAULT"))
+    db.session.commit()
+    return days_ahead + 1
+
+def drop_expired_notification_partitions(cutoff):
+    """Drop every daily partition whose whole range ends at or before `cutoff`."""
+    partitions = db.session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'notifications' AND child.relname LIKE :prefix"
+    ), {"prefix": f"{PARTITION_PREFIX}%"}).scalars().all()
+
+    dropped = []
+    for name in partitions:
+        try:
+            day = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d")
+        except ValueError:
+            continue
+        if day + timedelta(days=1) <= cutoff:
+            db.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    db.session.commit()
+    return dropped
+
+def delete_notifications_before(cutoff, table="notifications", batch_size=RETENTION_DELETE_BATCH_SIZE):
+    """Range DELETE in bounded batches, committing between them. Returns rows deleted."""
+    deleted = 0
+    while True:
+        result = db.session.execute(text(
+            f"DELETE FROM {table} WHERE id IN ("
+            f"SELECT id FROM {table} WHERE created_at <= :cutoff LIMIT :batch_size)"
+        ), {"cutoff": cutoff, "batch_size": batch_size})
+        db.session.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
@@ -1,208 +1,210 @@
+import time
+from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.events import EVENT_JOB_MISSED
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
-import random
 from flask import Flask
+from ..config import Config
 
 from .notification_service import (
-    affirmationdaily,
-    generate_checkin_nudges,
     send_scheduled_notifications,
-    generate_morning_notifications,
-    generate_afternoon_notifications,
-    generate_evening_notifications,
-    generate_inactivity_nudges,
-    generate_monthly_recheck_reminders,
-    generate_fun_nudges,
-    generate_goal_setting_nudge,
-    generate_journaling_nudge,
-    generate_vision_board_nudge,
-    generate_mindfulness_nudge,
     delete_old_notifications
 )
-from .goal_service import update_goal_status_automatically
+from .delivery_window_service import dispatch_campaign_windows
+from .affirmation_reminder_service import dispatch_affirmation_reminders, backfill_reminder_minutes
+from .goal_service import update_goal_status_automatically, fire_due_goal_transitions, rebuild_goal_transition_index
+from .unread_counter_service import reconcile_unread_counters
+from .leader_election import leader_elector
+from .delayed_queue import dispatch_due_deliveries
+from .job_metrics import record_job_run, record_job_missed, purge_job_runs
+from ..instrumentation import collect
+from ..activity import flush_last_active
+from ..revocation import purge_expired_revocations
+
+# ✅ The one scheduler for the whole app. Light, frequent jobs share the default
+# pool; fan-outs and maintenance run on the "heavy" pool so they queue behind
+# each other instead of competing for database connections. Campaign pacing
+# gets a thread of its own so an hour-long maintenance run never stalls it
+# into a catch-up burst. A job never overlaps itself, and runs missed during
+# a restart collapse into one.
+scheduler = BackgroundScheduler(
+    executors={
+        "default": ThreadPoolExecutor(Config.SCHEDULER_WORKERS),
+        "heavy": ThreadPoolExecutor(Config.SCHEDULER_HEAVY_WORKERS),
+        "campaigns": ThreadPoolExecutor(1),
+    },
+    job_defaults={
+        "max_instances": 1,
+        "coalesce": True,
+        "misfire_grace_time": Config.SCHEDULER_MISFIRE_GRACE_SECONDS,
+    },
+)
+
+def _on_job_missed(event):
+    record_job_missed(event.job_id, event.scheduled_run_time)
+    print(f"⚠️ Job {event.job_id} missed its run at {event.scheduled_run_time}")
 
-# ✅ Initialize Scheduler
-scheduler = BackgroundScheduler()
+scheduler.add_listener(_on_job_missed, EVENT_JOB_MISSED)
 
 def start_scheduler(app: Flask):
-    """Start the scheduler and ensure jobs run inside Flask app context."""
+    """Start the scheduler and ensure jobs run inside Flask app context.
 
-    def job_wrapper(func):
-        """Wrap job functions to ensure they run inside `app.app_context()`"""
+    Every gunicorn worker registers the jobs, but only the process holding the
+    Redis leader lease actually runs them; the others stay on standby.
+    """
+
+    def job_wrapper(func, job_id):
+        """Wrap job functions to ensure they run inside `app.app_context()` on the leader only,
+        recording duration, rows returned, DB time, Redis round trips and failures
+        for `/admin/jobs` and the job_runs history."""
         def wrapped_func():
+            if not leader_elector.is_leader:
+                return
+            started_at = datetime.utcnow()
+            start = time.perf_counter()
+            rows, error = None, None
             with app.app_context():
-                func()
+                with collect() as collector:
+                    try:
+                        rows = func()
+                    except Exception as e:
+                        error = e
+                        print(f"❌ Job {job_id} failed: {str(e)}")
+                duration = time.perf_counter() - start
+                try:
+                    record_job_run(job_id, started_at, duration, rows, error, collector=collector, host=leader_elector.identity)
+                except Exception as e:
+                    print(f"❌ Failed to record metrics for job {job_id}: {str(e)}")
         return wrapped_func
 
-    # ✅ Job: Update Goal Status (Every 1 Minute)
-    scheduler.add_job(
-        func=job_wrapper(update_goal_status_automatically),
-        trigger=IntervalTrigger(minutes=5),
-        id='goal_status_updater',
-        name='Update goal statuses automatically',
-        replace_existing=True
-    )
-
-    # ✅ Job: Send Scheduled Notifications (Every 1 Minute)
-    scheduler.add_job(
-        func=job_wrapper(send_scheduled_notifications),
-        trigger=IntervalTrigger(minutes=5),
-        id="scheduled_notifications",
-        name="Send Scheduled Notifications",
-        replace_existing=True
-    )
-
-    # ✅ Job: Daily Morning Motivation (7:30 AM)
-    scheduler.add_job(
-        func=job_wrapper(generate_morning_notifications),
-        trigger=CronTrigger(hour=7, minute=30),
-        id="morning_notifications",
-        name="Send Morning Motivation Notifications",
-        replace_existing=True
-    )
-
-    # ✅ Job: Afternoon Motivation (Mon, Wed, Fri at 12:00 PM)
-    scheduler.add_job(
-        func=job_wrapper(generate_afternoon_notifications),
-        trigger=CronTrigger(day_of_week="mon,wed,fri", hour=14, minute=0),
-        id="afternoon_notifications",
-        name="Send Afternoon Motivation Notifications",
-        replace_existing=True
-    )
-
-    # ✅ Job: Evening Motivation (Tue, Thu, Sat, Sun at 7:00 PM)
-    scheduler.add_job(
-        func=job_wrapper(generate_evening_notifications),
-        trigger=CronTrigger(day_of_week="tue,thu,sat,sun", hour=14, minute=20),
-        id="evening_notifications",
-        name="Send Evening Motivation Notifications",
-        replace_existing=True
-    )
+    def schedule_leader_startup_jobs():
+        """One-shot jobs that rebuild leader-owned state. Queued each time this process takes
+        the lease, so they also run after a deploy where the old leader held on to it, or
+        after Redis lost the lease along with the timer index."""
+        # ✅ Job: Index every open goal's next transition (Once, on taking the lease)
+        scheduler.add_job(
+            func=job_wrapper(rebuild_goal_transition_index, "goal_transition_index"),
+            id="goal_transition_index",
+            name="Rebuild goal transition index",
+            executor="heavy",
+            replace_existing=True
+        )
 
-    # ✅ Job: Weekly Inactivity Nudge (Randomly on Tue or Thu at 6:00 PM)
-    random_day = random.choice(["tue", "thu"])
-    scheduler.add_job(
-        func=job_wrapper(generate_inactivity_nudges),
-        trigger=CronTrigger(day_of_week=random_day, hour=18, minute=0),
-        id="inactivity_nudges",
-        name="Send Weekly Inactivity Nudges",
-        replace_existing=True
-    )
+        # ✅ Job: Fill reminder_minute for affirmations saved before it existed (Once, on taking the lease)
+        scheduler.add_job(
+            func=job_wrapper(backfill_reminder_minutes, "affirmation_reminder_backfill"),
+            id="affirmation_reminder_backfill",
+            name="Backfill affirmation reminder minutes",
+            executor="heavy",
+            replace_existing=True
+        )
 
-    # ✅ Job: Monthly Recheck Reminder (1st Day of Month at 7:30 PM)
-    scheduler.add_job(
-        func=job_wrapper(generate_monthly_recheck_reminders),
-        trigger=CronTrigger(day=1, hour=19, minute=30),
-        id="monthly_recheck_reminder",
-        name="Send Monthly Recheck Reminder",
-        replace_existing=True
-    )
+    leader_elector.on_acquire(schedule_leader_startup_jobs)
+    leader_elector.start()
 
-    # ✅ Job: Weekly Fun Nudge (Randomly on Sat or Sun at 2:00 PM)
-    random_day = random.choice(["sat", "sun"])
+    # ✅ Job: Fire due goal transitions from the timer index (Every 5 Seconds)
     scheduler.add_job(
-        func=job_wrapper(generate_fun_nudges),
-        trigger=CronTrigger(day_of_week=random_day, hour=14, minute=15),
-        id="fun_nudges",
-        name="Send Weekly Fun Nudges",
+        func=job_wrapper(fire_due_goal_transitions, "goal_timers"),
+        trigger=IntervalTrigger(seconds=5),
+        id="goal_timers",
+        name="Fire due goal status transitions",
         replace_existing=True
     )
 
-    # ✅ Job: Morning Check-In (Daily at 9:30 AM)
+    # ✅ Job: Update Goal Status, safety net for missed timers (Hourly)
     scheduler.add_job(
-        func=job_wrapper(lambda: generate_checkin_nudges("morning")),
-        trigger=CronTrigger(hour=9, minute=30),
-        id="morning_checkin",
-        name="Send Morning Check-In Nudges",
+        func=job_wrapper(update_goal_status_automatically, "goal_status_updater"),
+        trigger=IntervalTrigger(hours=1),
+        id='goal_status_updater',
+        name='Update goal statuses automatically',
+        executor="heavy",
         replace_existing=True
     )
 
-    # ✅ Job: Evening Check-In (Daily at 8:30 PM)
+    # ✅ Job: Send Scheduled Notifications (Every 1 Minute)
     scheduler.add_job(
-        func=job_wrapper(lambda: generate_checkin_nudges("evening")),
-        trigger=CronTrigger(hour=20, minute=30),
-        id="evening_checkin",
-        name="Send Evening Check-In Nudges",
+        func=job_wrapper(send_scheduled_notifications, "scheduled_notifications"),
+        trigger=IntervalTrigger(minutes=5),
+        id="scheduled_notifications",
+        name="Send Scheduled Notifications",
         replace_existing=True
     )
 
-    # ✅ Job: Morning Affirmation (Daily at 7:00 AM)
+    # ✅ Job: Hand due reminder / session pushes from the delayed queue to the outbox (Every 5 Seconds)
     scheduler.add_job(
-        func=job_wrapper(lambda: affirmationdaily("morning")),
-        trigger=CronTrigger(hour=7, minute=0),
-        id="morning_affirmation",
-        name="Send Morning Affirmations",
+        func=job_wrapper(dispatch_due_deliveries, "delayed_deliveries"),
+        trigger=IntervalTrigger(seconds=5),
+        id="delayed_deliveries",
+        name="Dispatch Due Delayed Notifications",
         replace_existing=True
     )
 
-    # ✅ Job: Afternoon Affirmation (Daily at 3:00 PM)
+    # ✅ Job: Write last-seen times from Redis to users.last_active (Every 1 Minute)
     scheduler.add_job(
-        func=job_wrapper(lambda: affirmationdaily("afternoon")),
-        trigger=CronTrigger(hour=15, minute=0),
-        id="afternoon_affirmation",
-        name="Send Afternoon Affirmations",
+        func=job_wrapper(flush_last_active, "flush_last_active"),
+        trigger=IntervalTrigger(minutes=1),
+        id="flush_last_active",
+        name="Flush User Last Active",
         replace_existing=True
     )
 
-    # ✅ Job: Weekly Goal Setting (Sunday at 6:00 PM)
+    # ✅ Job: Daily / weekly campaigns in each user's local window, paced and rate limited (Every 1 Minute)
     scheduler.add_job(
-        func=job_wrapper(generate_goal_setting_nudge),
-        trigger=CronTrigger(day_of_week="sun", hour=18, minute=0),
-        id="goal_setting",
-        name="Send Weekly Goal-Setting Reminder",
+        func=job_wrapper(dispatch_campaign_windows, "campaign_windows"),
+        trigger=CronTrigger(second=0),
+        id="campaign_windows",
+        name="Dispatch Campaign Windows",
+        executor="campaigns",
         replace_existing=True
     )
 
-    # ✅ Job: Morning Gratitude (Every other day at 7:15 AM)
+    # ✅ Job: Affirmation reminders due this minute in each user's local time (Every 1 Minute)
     scheduler.add_job(
-        func=job_wrapper(lambda: generate_journaling_nudge("morning")),
-        trigger=CronTrigger(day="*/2", hour=7, minute=15),
-        id="morning_journaling",
-        name="Send Morning Gratitude Journaling Reminder",
+        func=job_wrapper(dispatch_affirmation_reminders, "affirmation_reminders"),
+        trigger=CronTrigger(second=0),
+        id="affirmation_reminders",
+        name="Dispatch Affirmation Reminders",
         replace_existing=True
     )
 
-    # ✅ Job: End-of-Day Reflection (Every other day at 9:00 PM)
     scheduler.add_job(
-        func=job_wrapper(lambda: generate_journaling_nudge("evening")),
-        trigger=CronTrigger(day="*/2", hour=21, minute=0),
-        id="evening_journaling",
-        name="Send End-of-Day Reflection Reminder",
+        func=job_wrapper(delete_old_notifications, "delete_old_notifications"),
+        trigger=CronTrigger(minute=0),  # This will run every hour, at minute 0
+        id="delete_old_notifications",
+        name="Delete Old Notifications",
+        executor="heavy",
         replace_existing=True
     )
 
-    # ✅ Job: Vision Board Update (Saturday at 11:00 AM)
+    # ✅ Job: Reconcile Redis unread counters with the database (Hourly, after cleanup)
     scheduler.add_job(
-        func=job_wrapper(generate_vision_board_nudge),
-        trigger=CronTrigger(day_of_week="sat", hour=11, minute=0),
-        id="vision_board",
-        name="Send Weekly Vision Board Reminder",
+        func=job_wrapper(reconcile_unread_counters, "reconcile_unread_counters"),
+        trigger=CronTrigger(minute=10),
+        id="reconcile_unread_counters",
+        name="Reconcile Unread Notification Counters",
+        executor="heavy",
         replace_existing=True
     )
 
-    # ✅ Job: Morning Mindfulness (Daily at 8:30 AM)
+    # ✅ Job: Drop revocations of tokens that have expired anyway (Daily at 3:00 AM)
     scheduler.add_job(
-        func=job_wrapper(lambda: generate_mindfulness_nudge("morning")),
-        trigger=CronTrigger(hour=8, minute=30),
-        id="morning_mindfulness",
-        name="Send Morning Mindfulness Reminder",
+        func=job_wrapper(purge_expired_revocations, "purge_expired_revocations"),
+        trigger=CronTrigger(hour=3, minute=0),
+        id="purge_expired_revocations",
+        name="Purge Expired Token Revocations",
+        executor="heavy",
         replace_existing=True
     )
 
-    # ✅ Job: Afternoon Mindfulness (Daily at 2:30 PM)
+    # ✅ Job: Drop job run history past its retention (Daily at 3:30 AM)
     scheduler.add_job(
-        func=job_wrapper(lambda: generate_mindfulness_nudge("afternoon")),
-        trigger=CronTrigger(hour=14, minute=30),
-        id="afternoon_mindfulness",
-        name="Send Afternoon Mindfulness Reminder",
-        replace_existing=True
-    )
-    scheduler.add_job(
-        func=job_wrapper(delete_old_notifications),
-        trigger=CronTrigger(minute=0),  # This will run every hour, at minute 0
-        id="delete_old_notifications",
-        name="Delete Old Notifications",
+        func=job_wrapper(purge_job_runs, "purge_job_runs"),
+        trigger=CronTrigger(hour=3, minute=30),
+        id="purge_job_runs",
+        name="Purge Old Job Runs",
+        executor="heavy",
         replace_existing=True
     )
 
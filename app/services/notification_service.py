@@ -1,10 +1,27 @@
 from ..db import db
 from flask import current_app
-from ..models import Notifications, User  # Import user model
+from ..models import Notifications, User, BroadcastNotification, NotificationOutbox  # Import user model
 from datetime import datetime, timedelta
-from ..socketio import send_realtime_notification
-from ..redis_config import redis_client
+from ..timezones import USERS_ROOM, TIMEZONE_ROOM
 from random import choice
+from .campaign_service import run_campaign
+from .segment_service import segment_audience
+from .unread_counter_service import increment_unread, track_broadcast
+from .outbox_service import enqueue, outbox_row, purge_outbox
+from .notification_partition_service import (
+    DEFAULT_PARTITION,
+    is_partitioned,
+    ensure_notification_partitions,
+    drop_expired_notification_partitions,
+    delete_notifications_before
+)
+from sqlalchemy import insert, select, update, literal, func
+
+# ✅ Users covered by each INSERT ... SELECT when fanning out to everyone
+FANOUT_CHUNK_SIZE = 5000
+
+# ✅ Due notifications claimed per SKIP LOCKED page
+DISPATCH_CHUNK_SIZE = 500
 
 def create_notification(
     title,
@@ -17,83 +34,201 @@ def create_notification(
     service="Anshap",
     status="pending",
     live_until=None,
-    all_users=False  # ✅ Flag for common notifications
+    all_users=False,  # ✅ Flag for common notifications
+    deliver=False  # ✅ Queue a real-time push in the same transaction
 ):
-    try:
-        notifications = []
+    """Store one notification (or fan out to everyone with `all_users`).
 
+    With `deliver=True` an outbox entry is committed together with the row and
+    the delivery worker pushes it; the row is stored as `sent` so
+    send_scheduled_notifications does not push it a second time.
+    """
+    try:
         if all_users:
-            # ✅ Fetch all user IDs
-            users = User.query.with_entities(User.id).all()
-            user_ids = [user.id for user in users]
-
-            for uid in user_ids:
-                new_notification = Notifications(
-                    title=title,
-                    description=description,
-                    navigation=navigation,
-                    body=body,
-                    image=image,
-                    user_id=uid,
-                    type=type,
-                    service=service,
-                    status=status,
-                    live_until=live_until
-                )
-                db.session.add(new_notification)
-                notifications.append(new_notification)
-        else:
-            new_notification = Notifications(
+            # ✅ Copy the rows in the database instead of building one object per user
+            return fan_out_notification(
                 title=title,
                 description=description,
                 navigation=navigation,
                 body=body,
                 image=image,
-                user_id=user_id,
                 type=type,
                 service=service,
                 status=status,
                 live_until=live_until
             )
-            db.session.add(new_notification)
-            notifications.append(new_notification)
 
+        new_notification = Notifications(
+            title=title,
+            description=description,
+            navigation=navigation,
+            body=body,
+            image=image,
+            user_id=user_id,
+            type=type,
+            service=service,
+            status="sent" if deliver else status,
+            live_until=live_until
+        )
+        db.session.add(new_notification)
+        if deliver:
+            db.session.flush()
+            enqueue(new_notification.to_dict(), user_id=user_id, notification_id=new_notification.id)
         db.session.commit()
-
-        return notifications
     except Exception as e:
         db.session.rollback()
         raise ValueError(f"Error creating notification: {str(e)}")
 
-def send_scheduled_notifications():
-    """Send pending scheduled notifications to users."""
-    with current_app.app_context(): 
-        try:
-            # ✅ Fetch pending notifications
-            pending_notifications = Notifications.query.filter(
-                Notifications.status == "pending",
-                Notifications.live_until <= datetime.utcnow()
-            ).all()
+    increment_unread([user_id])
+    return [new_notification]
+
+def fan_out_notification(
+    title,
+    description,
+    navigation="",
+    body="",
+    image="",
+    type="info",
+    service="Anshap",
+    status="pending",
+    live_until=None,
+    chunk_size=FANOUT_CHUNK_SIZE
+):
+    """Insert one notification per user with INSERT ... SELECT from `users`.
+
+    Users are walked in keyset-paginated id ranges of `chunk_size`, each range
+    is copied and committed on its own, so memory stays flat whatever the
+    user count. Returns the number of rows inserted.
+    """
+    table = Notifications.__table__
+    values = {
+        "title": title,
+        "description": description,
+        "navigation": navigation,
+        "body": body,
+        "image": image,
+        "type": type,
+        "service": service,
+        "status": status,
+        "is_read": False,
+        "created_at": datetime.utcnow(),
+        "live_until": live_until,
+    }
+    constants = [literal(value, table.c[name].type) for name, value in values.items()]
+    columns = list(values) + ["user_id"]
+
+    inserted = 0
+    last_id = 0
+    while True:
+        # ✅ Upper id of the next chunk; only this scalar comes back to Python
+        chunk = select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size).subquery()
+        upper_id = db.session.execute(select(func.max(chunk.c.id))).scalar()
+        if upper_id is None:
+            break
+
+        rows = select(*constants, User.id).where(User.id > last_id, User.id <= upper_id)
+        user_ids = db.session.execute(
+            insert(table).from_select(columns, rows).returning(table.c.user_id)
+        ).scalars().all()
+        db.session.commit()
+
+        # ✅ Only this chunk's ids come back, to bump the badge counters
+        increment_unread(user_ids)
+        inserted += len(user_ids)
+        last_id = upper_id
+
+    print(f"📢 Fanned out '{title}' to {inserted} users.")
+    return inserted
+
+def create_broadcast_notification(
+    title,
+    description,
+    navigation="",
+    body="",
+    image="",
+    type="info",
+    service="Anshap",
+    live_until=None,
+    timezone=None
+):
+    """Store one notification for every user (or every user in `timezone`); readers merge it into their inbox."""
+    try:
+        broadcast = BroadcastNotification(
+            title=title,
+            description=description,
+            navigation=navigation,
+            body=body,
+            image=image,
+            type=type,
+            service=service,
+            live_until=live_until,
+            timezone=timezone
+        )
+        db.session.add(broadcast)
+        db.session.flush()
+
+        # ✅ One outbox entry reaches every connected user (or every user in the zone's room)
+        enqueue(broadcast.to_dict(), room=TIMEZONE_ROOM.format(timezone) if timezone else USERS_ROOM)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise ValueError(f"Error creating broadcast notification: {str(e)}")
+
+    track_broadcast(broadcast)
+    return broadcast
 
-            for notification in pending_notifications:
-                user_id = notification.user_id
+def send_scheduled_notifications(chunk_size=DISPATCH_CHUNK_SIZE):
+    """Claim due pending notifications in chunks, mark them sent and queue their push.
 
-                # ✅ Send real-time notification if the user is online
-                if redis_client.hexists("active_users", str(user_id)):
-                    send_realtime_notification(user_id, notification)
-                    print(f"📢 Sent real-time scheduled notification to User {user_id}")
+    Each keyset page is locked with SELECT ... FOR UPDATE SKIP LOCKED, flipped
+    to `sent` with one UPDATE and committed together with its outbox entries
+    before the next page is claimed, so several workers can drain a backlog in
+    parallel without double-sending or holding the whole result set. Returns
+    the number of notifications sent.
+    """
+    with current_app.app_context(): 
+        sent = 0
+        last_id = 0
+        now = datetime.utcnow()
+        try:
+            while True:
+                # ✅ Claim the next page; rows locked by another worker are skipped
+                claimed = db.session.execute(
+                    select(Notifications).where(
+                        Notifications.status == "pending",
+                        Notifications.live_until <= now,
+                        Notifications.id > last_id
+                    ).order_by(Notifications.id).limit(chunk_size).with_for_update(skip_locked=True)
+                ).scalars().all()
+                if not claimed:
+                    break
+
+                ids = [notification.id for notification in claimed]
+                payloads = [(notification.live_until, dict(notification.to_dict(), status="sent")) for notification in claimed]
+
+                # ✅ Mark the whole page sent and queue its pushes; commit releases the locks
+                db.session.execute(
+                    update(Notifications).where(Notifications.id.in_(ids)).values(status="sent"),
+                    execution_options={"synchronize_session": False}
+                )
+                db.session.execute(insert(NotificationOutbox), [
+                    outbox_row(payload, user_id=payload["user_id"], notification_id=payload["id"], available_at=due_at)
+                    for due_at, payload in payloads
+                ])
+                db.session.commit()
 
-                # ✅ Mark notification as sent
-                notification.status = "sent"
+                sent += len(ids)
+                last_id = ids[-1]
 
-            db.session.commit()
-            print(f"✅ Sent {len(pending_notifications)} scheduled notifications.")
+            print(f"✅ Sent {sent} scheduled notifications.")
+            return sent
 
         except Exception as e:
             db.session.rollback()
-            print(f"❌ Error sending scheduled notifications: {str(e)}")
+            print(f"❌ Error sending scheduled notifications after {sent}: {str(e)}")
+            raise
                  
-def generate_morning_notifications():
+def generate_morning_notifications(timezone=None):
     messages = [
         "Start your day strong—your mental fitness journey awaits! 💪",
         "New day, new opportunities! Stay positive and keep moving forward. ☀️",
@@ -105,23 +240,22 @@ def generate_morning_notifications():
     # ✅ Select a random message
     message = choice(messages)
 
-    # ✅ Create notifications for all users using the existing create_notification function
-    create_notification(
+    # ✅ Store a single broadcast instead of one row per user
+    create_broadcast_notification(
         title="Morning Motivation 🌞",
         description=message,
-        all_users=True,  # Flag to send to all users
         type="info",
         service="Daily Motivation",
-        status="pending",
         live_until=datetime.utcnow(),
         navigation="",  # Default value for navigation
         body="",        # Default value for body
-        image=""        # Default value for image
+        image="",       # Default value for image
+        timezone=timezone
     )
 
     print(f"📢 Morning notifications sent to all users.")
 
-def generate_afternoon_notifications():
+def generate_afternoon_notifications(timezone=None):
     """Generate and send midday motivation notifications (Mon, Wed, Fri at 12:00 PM - 1:30 PM)"""
 
     # ✅ List of midday motivation messages
@@ -136,21 +270,20 @@ def generate_afternoon_notifications():
     # ✅ Select a random message
     message = choice(messages)
 
-    # ✅ Fetch all users
-    create_notification(
+    # ✅ Store a single broadcast instead of one row per user
+    create_broadcast_notification(
         title="Midday Motivation ☀️",
         description=message,
-        all_users=True,  # Flag to send to all users
         type="motivation",
         service="Daily Motivation",
-        status="pending",
         live_until=datetime.utcnow(),
         navigation="",  # Default value for navigation
         body="",        # Default value for body
-        image=""        # Default value for image
+        image="",       # Default value for image
+        timezone=timezone
     )
 
-def generate_evening_notifications():
+def generate_evening_notifications(timezone=None):
     """Generate and send wind-down encouragement notifications (Tue, Thu, Sat, Sun at 7:00 PM - 9:00 PM)"""
 
     # ✅ List of evening encouragement messages
@@ -165,23 +298,22 @@ def generate_evening_notifications():
     # ✅ Select a random message
     message = choice(messages)
 
-    create_notification(
+    create_broadcast_notification(
         title="Evening Reflection 🌙",
         description=message,
-        all_users=True,  # Flag to send to all users
         type="motivation",
         service="Daily Motivation",
-        status="pending",
         live_until=datetime.utcnow(),
         navigation="",  # Default value for navigation
         body="",        # Default value for body
-        image=""        # Default value for image
+        image="",       # Default value for image
+        timezone=timezone
     )
 
     print(f"📢 Evening motivation notifications sent to all users.")
 
-def generate_inactivity_nudges():
-    """Generate and send inactivity nudges to users who have been inactive for a week."""
+def generate_inactivity_nudges(audience=None):
+    """Generate and send inactivity nudges to users with no activity in the last week."""
     messages = [
         "It’s been a while! Let’s reconnect with your mental fitness goals today. 💪",
         "We miss you! Come back and check out what's new on Anshap. 🚀",
@@ -190,58 +322,25 @@ def generate_inactivity_nudges():
         "Your well-being is important—come back and take time for yourself. 🌱",
     ]
 
-    message = choice(messages)
-    last_active_threshold = datetime.utcnow() - timedelta(days=7)
-    inactive_users = User.query.filter(User.last_active < last_active_threshold).all()
-    user_ids = [user.id for user in inactive_users]
-
-    if not user_ids:
-        print("✅ No inactive users found this week. Skipping inactivity nudges.")
-        return
-
-    for user_id in user_ids:
-        create_notification(
-            title="Time to Reconnect! 🔄",
-            description=message,
-            user_id=user_id,
-            type="inactivity_nudge",
-            service="Weekly Nudge",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user_id)):
-            send_realtime_notification(user_id, "Time to Reconnect! 🔄")
-            print(f"📢 Sent real-time inactivity nudge to User {user_id}")
-
-    print(f"📢 Weekly inactivity nudges sent to {len(user_ids)} users.")
-    return user_ids
+    return run_campaign(
+        title="Time to Reconnect! 🔄",
+        messages=messages,
+        type="inactivity_nudge",
+        service="Weekly Nudge",
+        audience=segment_audience("inactive_7_days", audience=audience)
+    )
 
-def generate_monthly_recheck_reminders():
+def generate_monthly_recheck_reminders(audience=None):
     """Generate and send a mental fitness recheck reminder on the 1st of every month."""
-    message = "Time for a mental fitness check-up! Reassess your journey today. 💪"
-    users = User.query.with_entities(User.id).all()
-    user_ids = [user.id for user in users]
-
-    for user_id in user_ids:
-        create_notification(
-            title="Monthly Recheck Reminder 📅",
-            description=message,
-            user_id=user_id,
-            type="recheck_reminder",
-            service="Monthly Checkup",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user_id)):
-            send_realtime_notification(user_id, "Monthly Recheck Reminder 📅")
-            print(f"📢 Sent real-time monthly recheck reminder to User {user_id}")
-
-    print(f"📢 Monthly recheck reminders sent to {len(user_ids)} users.")
-    return user_ids
+    return run_campaign(
+        title="Monthly Recheck Reminder 📅",
+        messages="Time for a mental fitness check-up! Reassess your journey today. 💪",
+        type="recheck_reminder",
+        service="Monthly Checkup",
+        audience=audience
+    )
 
-def generate_fun_nudges():
+def generate_fun_nudges(audience=None):
     """Generate and send fun nudges on Saturday OR Sunday at 2:00 PM."""
     messages = [
         "It’s vibe check time! Discover something new about yourself today. 🎭",
@@ -251,29 +350,15 @@ def generate_fun_nudges():
         "Self-discovery starts with a single step—what will you explore today? 🔍",
     ]
 
-    message = choice(messages)
-    users = User.query.with_entities(User.id).all()
-    user_ids = [user.id for user in users]
-
-    for user_id in user_ids:
-        create_notification(
-            title="Weekly Fun Nudge 🎭",
-            description=message,
-            user_id=user_id,
-            type="fun_nudge",
-            service="Weekly Engagement",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user_id)):
-            send_realtime_notification(user_id, "Weekly Fun Nudge 🎭")
-            print(f"📢 Sent real-time fun nudge to User {user_id}")
-
-    print(f"📢 Weekly fun nudges sent to {len(user_ids)} users.")
-    return user_ids
+    return run_campaign(
+        title="Weekly Fun Nudge 🎭",
+        messages=messages,
+        type="fun_nudge",
+        service="Weekly Engagement",
+        audience=audience
+    )
 
-def generate_checkin_nudges(time_of_day):
+def generate_checkin_nudges(time_of_day, audience=None):
     """Generate and send check-in nudges (Morning at 9:30 AM, Evening at 8:30 PM)."""
     morning_messages = [
         "How are you feeling today? Connect with a Comfort Buddy now. ☀️",
@@ -291,30 +376,15 @@ def generate_checkin_nudges(time_of_day):
         "Self-reflection helps growth. How would you describe today in one word? 🔄",
     ]
 
-    messages = morning_messages if time_of_day == "morning" else evening_messages
-    message = choice(messages)
-    users = User.query.with_entities(User.id).all()
-    user_ids = [user.id for user in users]
-
-    for user_id in user_ids:
-        create_notification(
-            title=f"Daily Check-In: {time_of_day.capitalize()} ☀️" if time_of_day == "morning" else "Daily Check-In: Evening 🌙",
-            description=message,
-            user_id=user_id,
-            type="checkin_nudge",
-            service="Daily Check-In",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user_id)):
-            send_realtime_notification(user_id, f"Daily Check-In: {time_of_day.capitalize()} ☀️")
-            print(f"📢 Sent real-time {time_of_day} check-in nudge to User {user_id}")
-
-    print(f"📢 {time_of_day.capitalize()} check-in nudges sent to {len(user_ids)} users.")
-    return user_ids
+    return run_campaign(
+        title="Daily Check-In: Morning ☀️" if time_of_day == "morning" else "Daily Check-In: Evening 🌙",
+        messages=morning_messages if time_of_day == "morning" else evening_messages,
+        type="checkin_nudge",
+        service="Daily Check-In",
+        audience=audience
+    )
 
-def affirmationdaily(time_of_day):
+def affirmationdaily(time_of_day, audience=None):
     """Generate and send affirmations (Morning at 7:00 AM, Afternoon at 3:00 PM)."""
     morning_affirmations = [
         "Start your day strong—look in the mirror and repeat today’s affirmation. ☀️",
@@ -332,53 +402,25 @@ def affirmationdaily(time_of_day):
         "I am resilient, and I overcome challenges with ease. 🔥",
     ]
 
-    affirmations = morning_affirmations if time_of_day == "morning" else afternoon_affirmations
-    message = choice(affirmations)
-    users = User.query.with_entities(User.id).all()
-    user_ids = [user.id for user in users]
-
-    for user_id in user_ids:
-        create_notification(
-            title=f"Morning Affirmation ☀️" if time_of_day == "morning" else "Afternoon Affirmation ⚡",
-            description=message,
-            user_id=user_id,
-            type="affirmation",
-            service="Daily Affirmation",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user_id)):
-            send_realtime_notification(user_id, f"Morning Affirmation ☀️" if time_of_day == "morning" else "Afternoon Affirmation ⚡")
-            print(f"📢 Sent real-time {time_of_day} affirmation to User {user_id}")
-
-    print(f"📢 {time_of_day.capitalize()} affirmations sent to {len(user_ids)} users.")
-    return user_ids
+    return run_campaign(
+        title="Morning Affirmation ☀️" if time_of_day == "morning" else "Afternoon Affirmation ⚡",
+        messages=morning_affirmations if time_of_day == "morning" else afternoon_affirmations,
+        type="affirmation",
+        service="Daily Affirmation",
+        audience=audience
+    )
 
-def generate_goal_setting_nudge():
+def generate_goal_setting_nudge(audience=None):
     """Generate and send a goal-setting reminder every Sunday at 6:00 PM."""
-    message = "Set your goals for the week—small steps, big wins! 🎯"
-    users = User.query.with_entities(User.id).all()
-    notifications = []
-
-    for user in users:
-        create_notification(
-            title="Weekly Goal Setting 📝",
-            description=message,
-            user_id=user.id,
-            type="goal_setting",
-            service="Weekly Planning",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user.id)):
-            send_realtime_notification(user.id, "Weekly Goal Setting 📝")
-
-    print(f"📢 Goal-setting reminders sent to {len(users)} users.")
-    return notifications
+    return run_campaign(
+        title="Weekly Goal Setting 📝",
+        messages="Set your goals for the week—small steps, big wins! 🎯",
+        type="goal_setting",
+        service="Weekly Planning",
+        audience=audience
+    )
 
-def generate_journaling_nudge(time_of_day):
+def generate_journaling_nudge(time_of_day, audience=None):
     """Generate and send journaling reminders (Morning Gratitude, End-of-Day Reflection)."""
     morning_messages = [
         "What’s one thing you’re grateful for today? Let’s journal it now. ☀️",
@@ -391,50 +433,26 @@ def generate_journaling_nudge(time_of_day):
         "What was the best moment of your day? Capture it in your journal! 📖",
     ]
 
-    message = choice(morning_messages) if time_of_day == "morning" else choice(evening_messages)
-    users = User.query.with_entities(User.id).all()
-    notifications = []
-
-    for user in users:
-        create_notification(
-            title="Morning Gratitude ✨" if time_of_day == "morning" else "End-of-Day Reflection 🌙",
-            description=message,
-            user_id=user.id,
-            type="journaling",
-            service="Journaling",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user.id)):
-            send_realtime_notification(user.id, f"Morning Gratitude ✨" if time_of_day == "morning" else "End-of-Day Reflection 🌙")
-
-    print(f"📢 {time_of_day.capitalize()} journaling reminders sent to {len(users)} users.")
-    return notifications
+    return run_campaign(
+        title="Morning Gratitude ✨" if time_of_day == "morning" else "End-of-Day Reflection 🌙",
+        messages=morning_messages if time_of_day == "morning" else evening_messages,
+        type="journaling",
+        service="Journaling",
+        audience=segment_audience("no_journaling_this_week", audience=audience)  # ✅ Skip users who already journaled
+    )
 
 
-def generate_vision_board_nudge():
+def generate_vision_board_nudge(audience=None):
     """Generate and send a Vision Board reminder every Saturday at 11:00 AM."""
-    message = "Update your Vision Board and stay inspired for the week ahead! 🎨"
-    users = User.query.with_entities(User.id).all()
-
-    for user in users:
-        create_notification(
-            title="Vision Board Update 🎨",
-            description=message,
-            user_id=user.id,
-            type="vision_board",
-            service="Weekly Inspiration",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user.id)):
-            send_realtime_notification(user.id, "Vision Board Update 🎨")
-
-    print(f"📢 Vision board reminders sent to {len(users)} users.")
+    return run_campaign(
+        title="Vision Board Update 🎨",
+        messages="Update your Vision Board and stay inspired for the week ahead! 🎨",
+        type="vision_board",
+        service="Weekly Inspiration",
+        audience=audience
+    )
 
-def generate_mindfulness_nudge(time_of_day):
+def generate_mindfulness_nudge(time_of_day, audience=None):
     """Generate and send mindfulness reminders (Morning & Afternoon)."""
     
     messages = [
@@ -442,44 +460,42 @@ def generate_mindfulness_nudge(time_of_day):
         "Take a moment to reset your mind—tap into mindfulness now. 🧘‍♂️",
         "A calm mind is a productive mind—relax and take a deep breath. ☁️",
     ]
-    
-    message = choice(messages)
-
-    users = User.query.with_entities(User.id).all()
-    notifications = []
-
-    for user in users:
-        create_notification(
-            title="Morning Mindfulness 🌞" if time_of_day == "morning" else "Afternoon Mindfulness ☀️",
-            description=message,
-            user_id=user.id,
-            type="mindfulness",
-            service="Daily Mindfulness",
-            status="pending",
-            live_until=datetime.utcnow()
-        )
-
-        if redis_client.hexists("active_users", str(user.id)):
-            send_realtime_notification(user.id, f"Morning Mindfulness 🌞" if time_of_day == "morning" else "Afternoon Mindfulness ☀️")
 
-    print(f"📢 {time_of_day.capitalize()} mindfulness reminders sent to {len(users)} users.")
-    return notifications
+    return run_campaign(
+        title="Morning Mindfulness 🌞" if time_of_day == "morning" else "Afternoon Mindfulness ☀️",
+        messages=messages,
+        type="mindfulness",
+        service="Daily Mindfulness",
+        audience=audience
+    )
 
 def delete_old_notifications():
-    """Delete notifications older than 24 hours."""
+    """Delete notifications older than 24 hours.
+
+    When `notifications` is partitioned, whole days are dropped, so rows live
+    between 24 and 48 hours rather than exactly 24, and upcoming partitions
+    are created. Otherwise rows are removed with bounded range DELETEs; a
+    table created before partitioning stays on that path until the
+    "partition notifications by day" migration converts it.
+    """
     # Calculate 24 hours ago
     threshold_time = datetime.utcnow() - timedelta(days=1)
-    
-    # Query to find notifications older than 24 hours
-    old_notifications = db.session.query(Notifications).filter(Notifications.created_at <= threshold_time).all()
-    
-    # Delete notifications older than 24 hours
-    for notification in old_notifications:
-        db.session.delete(notification)
 
-    # Commit the changes to the database
+    if is_partitioned():
+        dropped = drop_expired_notification_partitions(threshold_time)
+        deleted = delete_notifications_before(threshold_time, table=DEFAULT_PARTITION)
+        ensure_notification_partitions()
+        print(f"📅 Dropped notification partitions {dropped}; {deleted} stray rows deleted.")
+    else:
+        deleted = delete_notifications_before(threshold_time)
+        print(f"📅 Deleted {deleted} notifications older than 24 hours.")
+
+    # Broadcasts go in one statement; their read states cascade in the database
+    old_broadcasts = BroadcastNotification.query.filter(
+        BroadcastNotification.created_at <= threshold_time
+    ).delete(synchronize_session=False)
     db.session.commit()
 
-    print(f"📅 Deleted {len(old_notifications)} notifications older than 24 hours.")
-    
-    
\ No newline at end of file
+    purged = purge_outbox(threshold_time)
+
+    print(f"📅 Deleted {old_broadcasts} broadcasts and {purged} outbox entries older than 24 hours.")
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete
+from ..db import db
+from ..models import NotificationOutbox
+from ..presence import online_user_ids
+from ..socketio import socketio
+from .job_metrics import record_dispatch_lag
+
+# ✅ Lower drains first: session reminders never queue behind motivational fan-outs
+PRIORITY_URGENT = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_NUDGE = 10
+
+URGENT_TYPES = {"session_reminder", "reminder", "affirmation_reminder"}
+NUDGE_TYPES = {
+    "motivation", "checkin_nudge", "affirmation", "fun_nudge", "inactivity_nudge", "recheck_reminder",
+    "goal_setting", "journaling", "vision_board", "mindfulness",
+}
+
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = timedelta(seconds=10)  # Doubled on every failed attempt
+OUTBOX_PURGE_BATCH_SIZE = 5000
+
+def priority_for(notification_type):
+    if notification_type in URGENT_TYPES:
+        return PRIORITY_URGENT
+    if notification_type in NUDGE_TYPES:
+        return PRIORITY_NUDGE
+    return PRIORITY_DEFAULT
+
+def outbox_row(payload, user_id=None, notification_id=None, available_at=None, event="new_notification", room=None):
+    """Column values for one outbox entry, for bulk inserts alongside the notification rows."""
+    return {
+        "notification_id": notification_id,
+        "user_id": user_id,
+        "room": room,
+        "event": event,
+        "payload": payload,
+        "priority": priority_for(payload.get("type")),
+        "status": "pending",
+        "attempts": 0,
+        "available_at": available_at or datetime.utcnow(),
+        "created_at": datetime.utcnow(),
+    }
+
+def enqueue(payload, user_id=None, notification_id=None, available_at=None, event="new_notification", room=None):
+    """Add an outbox entry to the current transaction; the caller commits."""
+    entry = NotificationOutbox(**outbox_row(payload, user_id, notification_id, available_at, event, room))
+    db.session.add(entry)
+    return entry
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    """Claim one batch of due entries, push them over Socket.IO and record the outcome.
+
+    Entries are claimed with FOR UPDATE SKIP LOCKED in priority order so any
+    number of workers can drain in parallel. Users who are offline are marked
+    `skipped` (the notification is still in their inbox); emit failures are
+    retried with exponential backoff up to OUTBOX_MAX_ATTEMPTS. The delay
+    between each delivered entry's `available_at` (its due time) and the push
+    is added to the dispatch lag stats. Returns the number of entries claimed.
+    """
+    now = datetime.utcnow()
+    entries = db.session.execute(
+        select(NotificationOutbox).where(
+            NotificationOutbox.status == "pending",
+            NotificationOutbox.available_at <= now
+        ).order_by(
+            NotificationOutbox.priority, NotificationOutbox.available_at, NotificationOutbox.id
+        ).limit(batch_size).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not entries:
+        db.session.commit()
+        return 0
+
+    online = online_user_ids({entry.user_id for entry in entries if entry.user_id is not None})
+    delivered, skipped, lags = [], [], []
+    for entry in entries:
+        if entry.user_id is not None and entry.user_id not in online:
+            skipped.append(entry.id)
+            continue
+        try:
+            room = entry.room or (str(entry.user_id) if entry.user_id is not None else None)
+            socketio.emit(entry.event, entry.payload, room=room)
+            delivered.append(entry.id)
+            lags.append((entry.payload.get("type"), (now - entry.available_at).total_seconds()))
+        except Exception as e:
+            entry.attempts += 1
+            entry.last_error = str(e)
+            if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+                entry.status = "failed"
+            else:
+                entry.available_at = now + OUTBOX_RETRY_BACKOFF * 2 ** (entry.attempts - 1)
+
+    if delivered:
+        db.session.execute(
+            update(NotificationOutbox).where(NotificationOutbox.id.in_(delivered)).values(
+                status="delivered", delivered_at=datetime.utcnow(), attempts=NotificationOutbox.attempts + 1
+            ),
+            execution_options={"synchronize_session": False}
+        )
+    if skipped:
+        db.session.execute(
+            update(NotificationOutbox).where(NotificationOutbox.id.in_(skipped)).values(status="skipped"),
+            execution_options={"synchronize_session": False}
+        )
+    db.session.commit()
+
+    try:
+        record_dispatch_lag(lags)
+    except Exception as e:
+        print(f"⚠️ Failed to record dispatch lag: {str(e)}")
+
+    print(f"📮 Outbox: {len(delivered)} delivered, {len(skipped)} offline, {len(entries) - len(delivered) - len(skipped)} retrying.")
+    return len(entries)
+
+def purge_outbox(before, batch_size=OUTBOX_PURGE_BATCH_SIZE):
+    """Delete finished entries created before `before`, in bounded batches. Returns rows deleted."""
+    deleted = 0
+    while True:
+        ids = select(NotificationOutbox.id).where(
+            NotificationOutbox.status != "pending",
+            NotificationOutbox.created_at <= before
+        ).limit(batch_size).scalar_subquery()
+        result = db.session.execute(
+            delete(NotificationOutbox).where(NotificationOutbox.id.in_(ids)),
+            execution_options={"synchronize_session": False}
+        )
+        db.session.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
@@ -1,12 +1,6 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.date import DateTrigger
 from datetime import datetime, timedelta
-from .notification_service import send_realtime_notification, create_notification
-from ..redis_config import redis_client  
-
-# ✅ Initialize Scheduler
-scheduler = BackgroundScheduler()
-scheduler.start()
+from .notification_service import create_notification
+from .delayed_queue import schedule_delivery
 
 def schedule_reminder_notifications(reminder):
     """Schedule notifications at different intervals before a reminder time."""
@@ -23,8 +17,8 @@ def schedule_reminder_notifications(reminder):
     for time, description in notifications:
         if time > datetime.now():  # ✅ Ensure the time is in the future
             try:
-                # ✅ Create a notification in the database
-                notification = create_notification(
+                # ✅ Create the notification; its push is queued in the same transaction
+                [notification] = create_notification(
                     title=f"Reminder: {description}",
                     description=f"This is a reminder scheduled for {reminder_time}.",
                     navigation="/reminders",  
@@ -34,23 +28,17 @@ def schedule_reminder_notifications(reminder):
                     type="reminder",
                     service="ReminderService",
                     status="pending",
-                    live_until=reminder_time + timedelta(hours=1)
+                    live_until=reminder_time + timedelta(hours=1),
+                    deliver=True
                 )
 
-                # ✅ Check if the user is online and send a real-time notification
-                if redis_client.hexists("active_users", str(user_id)):
-                    send_realtime_notification(user_id, notification)
-                    print(f"📢 Sent real-time reminder to User {user_id} - {description}")
-                else:
-                    print(f"⚠️ User {user_id} is offline. Reminder saved for later.")
-
-                # ✅ Schedule a delayed notification
-                scheduler.add_job(
-                    send_realtime_notification,  # ✅ Send notification when scheduled time arrives
-                    trigger=DateTrigger(run_date=time),
-                    args=[user_id, notification.title, notification.description],
-                    id=f'reminder_{reminder.id}_{description}',
-                    replace_existing=True
+                # ✅ Queue the push for the scheduled time (survives restarts and deploys)
+                schedule_delivery(
+                    f'reminder_{reminder.id}_{description}',
+                    time,
+                    notification.to_dict(),
+                    user_id=user_id,
+                    notification_id=notification.id
                 )
                 
                 print(f"✅ Scheduled Reminder: '{description}' for User {user_id} at {time}")
@@ -1,14 +1,8 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.date import DateTrigger
 from datetime import datetime, timedelta
-from .notification_service import create_notification, send_realtime_notification
+from .notification_service import create_notification
+from .delayed_queue import schedule_delivery
 from ..db import db
 from ..models import User, Professional
-from ..redis_config import redis_client  # ✅ Import Redis to check if the user is online
-
-# ✅ Initialize Scheduler
-scheduler = BackgroundScheduler()
-scheduler.start()
 
 def schedule_session_notifications(schedule):
     """Schedule notifications for a user and professional before and during their session."""
@@ -38,7 +32,7 @@ def schedule_session_notifications(schedule):
         if time > datetime.utcnow():  # ✅ Ensure only future notifications are scheduled
             try:
                 # ✅ Schedule User Notification
-                user_notification = create_notification(
+                [user_notification] = create_notification(
                     title=f"Your session with {professional.user_name} is scheduled",
                     description=f"Time remaining: {description}",
                     navigation="/sessions/join",
@@ -49,10 +43,11 @@ def schedule_session_notifications(schedule):
                     service="ScheduleService",
                     status="pending",
                     live_until=end_time,
+                    deliver=True,  # ✅ Pushed by the outbox worker, not this request
                 )
 
                 # ✅ Schedule Professional Notification
-                professional_notification = create_notification(
+                [professional_notification] = create_notification(
                     title=f"Session with {user.user_name} is scheduled",
                     description=f"Time remaining: {description}",
                     navigation="/sessions/details",
@@ -63,33 +58,23 @@ def schedule_session_notifications(schedule):
                     service="ScheduleService",
                     status="pending",
                     live_until=end_time,
+                    deliver=True,  # ✅ Pushed by the outbox worker, not this request
                 )
 
-                # ✅ Check if User is Online & Send Real-Time Notification
-                if redis_client.hexists("active_users", str(user.id)):
-                    send_realtime_notification(user.id, user_notification)
-                    print(f"📢 Sent real-time session reminder to User {user.id} - {description}")
-
-                # ✅ Check if Professional is Online & Send Real-Time Notification
-                if redis_client.hexists("active_users", str(professional.id)):
-                    send_realtime_notification(professional.id, professional_notification)
-                    print(f"📢 Sent real-time session reminder to Professional {professional.id} - {description}")
-
-                # ✅ Schedule Delayed Notifications for Users Who Are Offline
-                scheduler.add_job(
-                    send_realtime_notification,
-                    trigger=DateTrigger(run_date=time),
-                    args=[user.id, user_notification.title, user_notification.description],
-                    id=f'user_session_{schedule.id}_{description}',
-                    replace_existing=True
+                # ✅ Queue the pushes for the scheduled time (survives restarts and deploys)
+                schedule_delivery(
+                    f'user_session_{schedule.id}_{description}',
+                    time,
+                    user_notification.to_dict(),
+                    user_id=user.id,
+                    notification_id=user_notification.id
                 )
-
-                scheduler.add_job(
-                    send_realtime_notification,
-                    trigger=DateTrigger(run_date=time),
-                    args=[professional.id, professional_notification],
-                    id=f'professional_session_{schedule.id}_{description}',
-                    replace_existing=True
+                schedule_delivery(
+                    f'professional_session_{schedule.id}_{description}',
+                    time,
+                    professional_notification.to_dict(),
+                    user_id=professional.id,
+                    notification_id=professional_notification.id
                 )
 
                 print(f"✅ Scheduled Session Reminder: '{description}' for User {user.id} & Professional {professional.id} at {time}")
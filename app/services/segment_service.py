@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, exists, or_, and_, func
+from ..db import db
+from ..models import User, DailyActivity, Journaling, Schedule
+
+# ✅ Statuses of a booked session that has not happened yet (same as the session counts)
+UPCOMING_SESSION_STATUSES = ("booked", "open", "pending")
+ONBOARDING_FLAGS = (
+    User.app_onboarding,
+    User.affirmation_onboarding,
+    User.journaling_onboarding,
+    User.visionboard_onboarding,
+)
+
+def _inactive_days(days):
+    def condition(now):
+        cutoff = now - timedelta(days=days)
+        # ✅ Users not seen since last_active tracking started fall back to their daily activity
+        return or_(
+            User.last_active < cutoff,
+            and_(
+                User.last_active.is_(None),
+                ~exists().where(DailyActivity.user_id == User.id, DailyActivity.date > cutoff.strftime('%Y-%m-%d'))
+            )
+        )
+    return condition
+
+def _no_journaling_this_week(now):
+    week_start = datetime.combine(now.date() - timedelta(days=now.weekday()), datetime.min.time())
+    return ~exists().where(Journaling.user_id == User.id, Journaling.date >= week_start)
+
+def _has_upcoming_session(now):
+    return exists().where(
+        Schedule.user_id == User.id,
+        Schedule.start_time > now,
+        Schedule.status.in_(UPCOMING_SESSION_STATUSES)
+    )
+
+def _onboarding_incomplete(now):
+    return or_(*(flag.isnot(True) for flag in ONBOARDING_FLAGS))
+
+# ✅ Named audiences. Each is a condition on users, correlated per user, so any
+# combination compiles into one SELECT users.id ... that the indexes on
+# (user_id, date / start_time) answer without loading a row per user.
+SEGMENTS = {
+    "inactive_7_days": _inactive_days(7),
+    "no_journaling_this_week": _no_journaling_this_week,
+    "has_upcoming_session": _has_upcoming_session,
+    "onboarding_incomplete": _onboarding_incomplete,
+}
+
+def segment_condition(*names, now=None):
+    """WHERE clauses selecting the users in every one of the named segments (times in UTC)."""
+    now = now or datetime.utcnow()
+    unknown = [name for name in names if name not in SEGMENTS]
+    if unknown:
+        raise ValueError(f"Unknown segment(s): {', '.join(unknown)}")
+    return [SEGMENTS[name](now) for name in names]
+
+def segment_audience(*names, audience=None, now=None):
+    """User ids in every named segment, narrowed from `audience` (default: all users), in id order.
+
+    The result is a select to hand to `run_campaign`, which streams it in chunks.
+    """
+    statement = audience if audience is not None else select(User.id).order_by(User.id)
+    return statement.where(*segment_condition(*names, now=now))
+
+def segment_size(*names, now=None):
+    return db.session.execute(
+        select(func.count()).select_from(User).where(*segment_condition(*names, now=now))
+    ).scalar()
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from ..db import db
+from ..models import Notifications, User, BroadcastNotification, BroadcastNotificationState
+from ..redis_config import redis_client
+
+# ✅ Per-user count of unread personal notifications
+UNREAD_KEY = "unread:{}"
+# ✅ Live broadcasts (member: id, score: created_at) and the ones each user has read or dismissed.
+# Broadcasts for one timezone live in their own set so only users in that zone count them.
+LIVE_BROADCASTS_KEY = "broadcasts:live"
+LIVE_TZ_BROADCASTS_KEY = "broadcasts:live:tz:{}"
+READ_BROADCASTS_KEY = "broadcasts:read:{}"
+# ✅ Matches the retention in delete_old_notifications
+BROADCAST_WINDOW = timedelta(days=1)
+
+RECONCILE_CHUNK_SIZE = 5000
+
+def _window_start():
+    return (datetime.utcnow() - BROADCAST_WINDOW).timestamp()
+
+def increment_unread(user_ids, amount=1):
+    """Add `amount` to the unread counter of every user in `user_ids` (one pipeline)."""
+    pipe = redis_client.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.incrby(UNREAD_KEY.format(user_id), amount)
+    pipe.execute()
+
+def decrement_unread(user_id, amount=1):
+    redis_client.decrby(UNREAD_KEY.format(user_id), amount)
+
+def _live_key(timezone):
+    return LIVE_TZ_BROADCASTS_KEY.format(timezone) if timezone else LIVE_BROADCASTS_KEY
+
+def track_broadcast(broadcast):
+    """Register a new broadcast so the badge of every user it targets includes it."""
+    key = _live_key(broadcast.timezone)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zadd(key, {broadcast.id: broadcast.created_at.timestamp()})
+    pipe.zremrangebyscore(key, "-inf", _window_start())
+    pipe.expire(key, BROADCAST_WINDOW * 2)
+    pipe.execute()
+
+def set_broadcast_read(user_id, broadcast, read=True):
+    """Count a broadcast as read (or dismissed) for one user, or undo that."""
+    key = READ_BROADCASTS_KEY.format(user_id)
+    pipe = redis_client.pipeline(transaction=False)
+    if read:
+        pipe.zadd(key, {broadcast.id: broadcast.created_at.timestamp()})
+        pipe.zremrangebyscore(key, "-inf", _window_start())
+        pipe.expire(key, BROADCAST_WINDOW * 2)
+    else:
+        pipe.zrem(key, broadcast.id)
+    pipe.execute()
+
+def count_unread_in_db(user_id):
+    return db.session.execute(
+        select(func.count()).select_from(Notifications).where(
+            Notifications.user_id == user_id,
+            Notifications.is_read.isnot(True)
+        )
+    ).scalar()
+
+def get_unread_count(user_id, timezone=None):
+    """Badge count: personal unread counter plus live broadcasts the user has not read.
+
+    `timezone` adds the broadcasts sent to the user's zone. One pipelined Redis
+    round trip; the database is only hit when the user's counter is missing,
+    and the recomputed value is stored for next time.
+    """
+    window_start = _window_start()
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.get(UNREAD_KEY.format(user_id))
+    pipe.zcount(LIVE_BROADCASTS_KEY, window_start, "+inf")
+    pipe.zcount(READ_BROADCASTS_KEY.format(user_id), window_start, "+inf")
+    if timezone:
+        pipe.zcount(_live_key(timezone), window_start, "+inf")
+    personal, live_broadcasts, read_broadcasts, *live_tz_broadcasts = pipe.execute()
+    live_broadcasts += sum(live_tz_broadcasts)
+
+    if personal is None:
+        personal = count_unread_in_db(user_id)
+        redis_client.set(UNREAD_KEY.format(user_id), personal, nx=True)
+
+    return max(int(personal), 0) + max(live_broadcasts - read_broadcasts, 0)
+
+def _reconcile_users(user_ids, window_start):
+    """Rewrite the counters of a sorted, contiguous batch of users from the database."""
+    counts = dict(db.session.execute(
+        select(Notifications.user_id, func.count()).where(
+            Notifications.user_id >= user_ids[0],
+            Notifications.user_id <= user_ids[-1],
+            Notifications.is_read.isnot(True)
+        ).group_by(Notifications.user_id)
+    ).all())
+
+    # Broadcasts each user has read or dismissed inside the live window
+    read_broadcasts = {}
+    for user_id, broadcast_id, created_at in db.session.execute(
+        select(BroadcastNotificationState.user_id, BroadcastNotification.id, BroadcastNotification.created_at)
+        .join(BroadcastNotification, BroadcastNotification.id == BroadcastNotificationState.broadcast_id)
+        .where(
+            BroadcastNotificationState.user_id >= user_ids[0],
+            BroadcastNotificationState.user_id <= user_ids[-1],
+            BroadcastNotification.created_at > window_start,
+            (BroadcastNotificationState.is_read.is_(True)) | (BroadcastNotificationState.dismissed.is_(True))
+        )
+    ).all():
+        read_broadcasts.setdefault(user_id, {})[broadcast_id] = created_at.timestamp()
+
+    pipe = redis_client.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.set(UNREAD_KEY.format(user_id), counts.get(user_id, 0))
+        pipe.delete(READ_BROADCASTS_KEY.format(user_id))
+        if user_id in read_broadcasts:
+            pipe.zadd(READ_BROADCASTS_KEY.format(user_id), read_broadcasts[user_id])
+            pipe.expire(READ_BROADCASTS_KEY.format(user_id), BROADCAST_WINDOW * 2)
+    pipe.execute()
+
+def refresh_unread_counter(user_id):
+    """Rebuild one user's counters after a bulk change to their inbox."""
+    _reconcile_users([user_id], datetime.utcnow() - BROADCAST_WINDOW)
+
+def reconcile_unread_counters(chunk_size=RECONCILE_CHUNK_SIZE):
+    """Rewrite every counter from the database, one user-id range per grouped query.
+
+    Corrects drift from retention deletes, races and lost Redis state. Returns
+    the number of users reconciled.
+    """
+    window_start = datetime.utcnow() - BROADCAST_WINDOW
+    reconciled = 0
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+
+        _reconcile_users(user_ids, window_start)
+
+        reconciled += len(user_ids)
+        last_id = user_ids[-1]
+
+    # ✅ Rebuild the live broadcast indexes (global and per timezone) from the table as well
+    live = {}
+    for broadcast_id, created_at, timezone in db.session.execute(
+        select(BroadcastNotification.id, BroadcastNotification.created_at, BroadcastNotification.timezone).where(
+            BroadcastNotification.created_at > window_start
+        )
+    ).all():
+        live.setdefault(_live_key(timezone), {})[broadcast_id] = created_at.timestamp()
+    pipe = redis_client.pipeline(transaction=True)
+    for key in {LIVE_BROADCASTS_KEY, *redis_client.scan_iter(LIVE_TZ_BROADCASTS_KEY.format("*")), *live}:
+        pipe.delete(key)
+        if key in live:
+            pipe.zadd(key, live[key])
+            pipe.expire(key, BROADCAST_WINDOW * 2)
+    pipe.execute()
+
+    print(f"🔢 Reconciled unread counters for {reconciled} users.")
+    return reconciled
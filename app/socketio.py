@@ -1,6 +1,8 @@
 from flask_socketio import SocketIO, emit, join_room, leave_room, send
 from flask import request, jsonify
 from .redis_config import redis_client  # Import Redis for active user storage
+from .presence import is_online
+from .timezones import USERS_ROOM, TIMEZONE_ROOM, get_user_timezone
 from .utils import token_required, parse_token
 from .models import Notifications, ChatRoom, ChatMessage, MessageAttachment
 import json
@@ -16,11 +18,16 @@ def handle_connect():
     """Handle the WebSocket connection."""
     print(f"🚀 New connection request received. SID: {request.sid}")
     user_id = request.args.get("user_id","42")
+    role = request.args.get("role", "user")
     print("user id in soket", user_id)
     try:
         # Store the active user session in Redis
         redis_client.hset("active_users",user_id, request.sid)
         join_room(user_id)
+        if role == "user":
+            # ✅ Broadcasts go to these rooms, so professionals never receive them
+            join_room(USERS_ROOM)
+            join_room(TIMEZONE_ROOM.format(get_user_timezone(user_id)))
         print(f"✅ User {user_id} connected and added to Redis.")
 
     except Exception as e:
@@ -63,8 +70,8 @@ def handle_custom_event(data):
 # ✅ Function to Send a Real-Time Notification to a Specific User
 def send_realtime_notification(user_id, notification):
     """Emit a real-time notification to a specific user if online."""
-    if redis_client.hexists("active_users", str(user_id)):  # Check if user is online
-        socketio.emit("new_notification", notification, room=user_id)
+    if is_online(user_id):  # Check if user is online
+        socketio.emit("new_notification", notification, room=str(user_id))
         print(f"📢 Real-time notification sent to user {user_id}")
     else:
         print(f"⚠️ User {user_id} is offline. Notification not sent in real-time.")
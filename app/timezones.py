@@ -0,0 +1,32 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import select
+from .config import Config
+from .db import db
+from .models import User
+from .redis_config import redis_client
+
+# ✅ user id -> IANA timezone, so request paths never query users just for the zone
+USER_TIMEZONES_KEY = "users:timezone"
+# ✅ Socket.IO rooms every user connection joins, used for broadcasts to all users or one timezone
+USERS_ROOM = "users"
+TIMEZONE_ROOM = "tz:{}"
+
+def is_valid_timezone(name):
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return False
+
+def cache_user_timezone(user_id, timezone):
+    redis_client.hset(USER_TIMEZONES_KEY, user_id, timezone)
+
+def get_user_timezone(user_id):
+    """The user's timezone from Redis, loading it from the database on a miss."""
+    timezone = redis_client.hget(USER_TIMEZONES_KEY, user_id)
+    if timezone is None:
+        timezone = db.session.execute(select(User.timezone).where(User.id == user_id)).scalar()
+        if timezone is None:
+            return Config.DEFAULT_TIMEZONE
+        cache_user_timezone(user_id, timezone)
+    return timezone
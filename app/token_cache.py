@@ -0,0 +1,62 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import jwt
+
+# ✅ Verified tokens kept per process; least recently used are dropped beyond this
+TOKEN_CACHE_SIZE = 10000
+
+# ✅ digest -> (claims, exp, revocation id); revocation id -> digest so a revocation can evict its token
+_verified = OrderedDict()
+_digests_by_jti = {}
+_lock = threading.Lock()
+
+def _digest(token, secret_key):
+    # The key is part of the digest so a rotated secret never serves claims verified with the old one
+    return hashlib.sha256(f"{secret_key}.{token}".encode()).hexdigest()
+
+def decode_token(token, secret_key):
+    """`jwt.decode` (HS256) with the result cached until the token's `exp`.
+
+    A token seen before is answered with a dict lookup instead of another
+    signature check. Raises the same jwt errors as `jwt.decode`; tokens
+    without `exp` are never cached. Callers get their own copy of the claims.
+    """
+    digest = _digest(token, secret_key)
+    with _lock:
+        entry = _verified.get(digest)
+        if entry is not None:
+            claims, exp, _ = entry
+            if exp > time.time():
+                _verified.move_to_end(digest)
+                return dict(claims)
+            _forget(digest)
+
+    claims = jwt.decode(token, secret_key, algorithms=['HS256'])
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        with _lock:
+            # Same id the revocation cache uses: the jti, or the SHA-256 of tokens issued without one
+            revocation_id = claims.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+            _verified[digest] = (claims, exp, revocation_id)
+            _digests_by_jti[revocation_id] = digest
+            while len(_verified) > TOKEN_CACHE_SIZE:
+                _forget(next(iter(_verified)))
+    return dict(claims)
+
+def _forget(digest):
+    _, _, revocation_id = _verified.pop(digest)
+    _digests_by_jti.pop(revocation_id, None)
+
+def evict_token(token_id):
+    """Drop a revoked token (by jti, or by digest for tokens without one) from the cache."""
+    with _lock:
+        digest = _digests_by_jti.get(token_id)
+        if digest in _verified:
+            _forget(digest)
+
+def clear_token_cache():
+    with _lock:
+        _verified.clear()
+        _digests_by_jti.clear()
@@ -1,2 +1,2 @@
-from .auth import token_required, parse_token
+from .auth import token_required, admin_required, parse_token, issue_token
 from .bounty_points import add_bounty_points
\ No newline at end of file
@@ -1,10 +1,30 @@
+import hmac
 import jwt
+import uuid
 from functools import wraps
 from flask import request, jsonify, current_app
 from jwt import ExpiredSignatureError, InvalidTokenError
 from ..db import db
 from datetime import datetime
-from ..models import ExpiredToken , User # Import your models (assuming SQLAlchemy is being used)
+from ..models import User # Import your models (assuming SQLAlchemy is being used)
+from ..activity import record_activity
+from ..revocation import token_id, is_revoked
+from ..token_cache import decode_token
+
+def issue_token(user_id, role, expires_in, refresh=False):
+    """Compact signed token: account id, role, a unique jti and expiry. Profiles come from `profile_cache`.
+
+    Refresh tokens are marked so they are only accepted by /auth/refresh.
+    """
+    payload = {
+        "user_id": user_id,
+        "role": role,
+        "jti": uuid.uuid4().hex,
+        "exp": int((datetime.utcnow() + expires_in).timestamp())
+    }
+    if refresh:
+        payload["type"] = "refresh"
+    return jwt.encode(payload, current_app.config['JWT_SECRET_KEY'], algorithm='HS256')
 
 def token_required(f):
     @wraps(f)
@@ -21,12 +41,13 @@ def token_required(f):
             if not secret_key:
                 raise Exception("JWT_SECRET_KEY not found in app config!")
 
-            # Decode the JWT token
-            data = jwt.decode(token, secret_key, algorithms=['HS256'])
+            # Decode the JWT token (verified once, then served from the per-process cache until it expires)
+            data = decode_token(token, secret_key)
+            if data.get('type') == 'refresh':
+                return jsonify({'message': 'Token is invalid!'}), 401
 
-            # Check if the token is blacklisted (expired or logged out)
-            expired_token = ExpiredToken.query.filter_by(token=token).first()
-            if expired_token:
+            # Check if the token is blacklisted (logged out); usually answered from memory
+            if is_revoked(token_id(token, data)):
                 return jsonify({'message': 'Token has been expired or logged out!'}), 401
 
             # Validate token expiration
@@ -37,6 +58,14 @@ def token_required(f):
 
             # Store user data in the request context and pass it to the decorated function
             current_user = data  # Assuming `data` contains all the necessary user info
+
+            # ✅ Last-seen for inactivity targeting; a Redis hiccup must not fail the request
+            if data.get('role') == 'user' and data.get('user_id'):
+                try:
+                    record_activity(data['user_id'])
+                except Exception as e:
+                    print(f"⚠️ Failed to record activity for user {data['user_id']}: {str(e)}")
+
             return f(current_user, *args, **kwargs)  # Pass current_user to the route handler
 
         except ExpiredSignatureError:
@@ -49,6 +78,18 @@ def token_required(f):
 
     return decorated
 
+def admin_required(f):
+    """Operator-only routes: the `X-Admin-Key` header must match ADMIN_API_KEY. Without a key configured they are closed."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        admin_key = current_app.config.get('ADMIN_API_KEY')
+        provided = request.headers.get('X-Admin-Key', '')
+        if not admin_key or not hmac.compare_digest(provided.encode(), admin_key.encode()):
+            return jsonify({'message': 'Admin access required!'}), 403
+        return f(*args, **kwargs)
+
+    return decorated
+
 def parse_token():
     """Parse and validate the token passed from the frontend."""
     token = request.auth.get('token')  # The token will be in the query string (URL params)
@@ -60,13 +101,17 @@ def parse_token():
     try:
         secret_key = current_app.config.get('JWT_SECRET_KEY')
         # Decode the JWT token using the secret key (replace Config.JWT_SECRET_KEY with your secret key)
-        decoded_token = jwt.decode(token, secret_key, algorithms=["HS256"])
+        decoded_token = decode_token(token, secret_key)
         user_id = decoded_token.get("user_id")  # Extract user_id or other relevant info
 
         if not user_id:
             print("❌ Invalid token, user_id not found")
             return None
 
+        if decoded_token.get("type") == "refresh" or is_revoked(token_id(token, decoded_token)):
+            print("❌ Token revoked or not an access token")
+            return None
+
         # Fetch the user from the database if the token is valid
         current_user = decoded_token
 
@@ -0,0 +1,31 @@
+"""Notification delivery worker.
+
+Drains the notification outbox and pushes entries over Socket.IO through the
+shared message queue, so web workers never block on delivery. Run one or more
+with `python -m app.workers.notify`; they split the work via SKIP LOCKED.
+"""
+import time
+from .. import create_app
+from ..db import db
+from ..services.outbox_service import drain_outbox, OUTBOX_BATCH_SIZE
+
+# ✅ Sleep between polls only when the last batch came back short
+POLL_INTERVAL_SECONDS = 1.0
+
+def run(batch_size=OUTBOX_BATCH_SIZE, poll_interval=POLL_INTERVAL_SECONDS):
+    app = create_app(start_jobs=False)
+    with app.app_context():
+        print("📮 Notification delivery worker started.")
+        while True:
+            try:
+                claimed = drain_outbox(batch_size)
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Error draining notification outbox: {str(e)}")
+                claimed = 0
+
+            if claimed < batch_size:
+                time.sleep(poll_interval)
+
+if __name__ == "__main__":
+    run()
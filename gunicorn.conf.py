@@ -1,5 +1,8 @@
 # gunicorn.conf.py
-workers = 4  # Number of workers
+import os
+
+workers = int(os.getenv("WEB_WORKERS", 4))  # Number of workers
+threads = 16  # Per worker; more than the password hashing slots, so a login burst never takes every thread
 bind = "0.0.0.0:4000"  # Address and port to bind to
 accesslog = '-'  # Log requests to stdout
 errorlog = '-'   # Log errors to stderr
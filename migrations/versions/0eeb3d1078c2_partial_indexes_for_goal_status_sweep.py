@@ -0,0 +1,38 @@
+"""partial indexes for goal status sweep
+
+Revision ID: 0eeb3d1078c2
+Revises: af25b6e82cae
+Create Date: 2026-10-18 08:00:26.564259
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.models.goals import CLOSED_FOR_COMPLETION, CLOSED_FOR_START
+
+
+# revision identifiers, used by Alembic.
+revision = '0eeb3d1078c2'
+down_revision = 'af25b6e82cae'
+branch_labels = None
+depends_on = None
+
+
+def _statuses(statuses):
+    return ", ".join(f"'{status}'" for status in statuses)
+
+
+def upgrade():
+    # Only open goals, ordered by when they end / start
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_goals_open_end_at ON goals ((end_date + end_time)) "
+        f"WHERE status NOT IN ({_statuses(CLOSED_FOR_COMPLETION)})"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_goals_unstarted_start_at ON goals ((start_date + start_time)) "
+        f"WHERE status NOT IN ({_statuses(CLOSED_FOR_START)})"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_goals_unstarted_start_at")
+    op.execute("DROP INDEX IF EXISTS ix_goals_open_end_at")
@@ -0,0 +1,35 @@
+"""add affirmation reminder_minute
+
+Revision ID: 2558e74ec457
+Revises: 0eeb3d1078c2
+Create Date: 2026-10-18 08:00:37.166228
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2558e74ec457'
+down_revision = '0eeb3d1078c2'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("permanent_affirmations", "daily_affirmations")
+
+
+def upgrade():
+    # Filled for existing rows by backfill_reminder_minutes, which the scheduler leader runs
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS reminder_minute SMALLINT")
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_reminder_minute ON {table} (reminder_minute) "
+            "WHERE reminder_active"
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_reminder_minute")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS reminder_minute")
@@ -0,0 +1,41 @@
+"""hmac refresh tokens with families
+
+Revision ID: 3cbd674462b4
+Revises: 41704d497419
+Create Date: 2026-10-18 08:01:30.000706
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3cbd674462b4'
+down_revision = '41704d497419'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if _has_column("refresh_tokens", "family_id"):
+        return
+
+    # Rows hashed with werkzeug can't be looked up by HMAC digest; those sessions sign in again
+    op.execute("DELETE FROM refresh_tokens WHERE token_hash LIKE '%$%'")
+    op.execute("ALTER TABLE refresh_tokens ALTER COLUMN token_hash TYPE VARCHAR(64)")
+    op.execute("ALTER TABLE refresh_tokens ADD COLUMN family_id VARCHAR(32)")
+    op.execute("UPDATE refresh_tokens SET family_id = md5(id::text)")
+    op.execute("ALTER TABLE refresh_tokens ALTER COLUMN family_id SET NOT NULL")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_refresh_tokens_family_id ON refresh_tokens (family_id)")
+
+
+def downgrade():
+    if not _has_column("refresh_tokens", "family_id"):
+        return
+    op.execute("DROP INDEX IF EXISTS ix_refresh_tokens_family_id")
+    op.execute("ALTER TABLE refresh_tokens DROP COLUMN family_id")
+    op.execute("ALTER TABLE refresh_tokens ALTER COLUMN token_hash TYPE VARCHAR(256)")
@@ -0,0 +1,34 @@
+"""index activity segment lookups
+
+Revision ID: 4121404f493f
+Revises: 2558e74ec457
+Create Date: 2026-10-18 08:00:45.859316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4121404f493f'
+down_revision = '2558e74ec457'
+branch_labels = None
+depends_on = None
+
+
+# Audience segments probe one user's recent rows in each of these
+INDEXES = (
+    ("ix_daily_activity_user_date", "daily_activity", "user_id, date"),
+    ("ix_journaling_user_date", "journaling", "user_id, date"),
+    ("ix_schedules_user_start", "schedules", "user_id, start_time"),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def downgrade():
+    for name, _, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
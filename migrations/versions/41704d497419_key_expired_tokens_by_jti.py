@@ -0,0 +1,85 @@
+"""key expired_tokens by jti
+
+Revision ID: 41704d497419
+Revises: e17f82c30837
+Create Date: 2026-10-18 08:01:07.473306
+
+"""
+import hashlib
+from datetime import datetime, timedelta
+import jwt
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '41704d497419'
+down_revision = 'e17f82c30837'
+branch_labels = None
+depends_on = None
+
+
+# Access tokens issued before this change lived this long; used when a stored token can't be read
+ACCESS_TOKEN_EXPIRY = timedelta(days=7)
+BATCH_SIZE = 5000
+
+
+def _has_column(table, column):
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _revocation(row_id, token, revoked_at):
+    """Old rows hold the raw token and the sign-out time. The new key for a token without a
+    jti is its SHA-256 (see app.revocation.token_id), kept until the token itself expires."""
+    try:
+        expires_at = datetime.utcfromtimestamp(jwt.decode(token, options={"verify_signature": False})["exp"])
+    except Exception:
+        expires_at = revoked_at + ACCESS_TOKEN_EXPIRY
+    return {
+        "row_id": row_id,
+        "jti": hashlib.sha256(token.encode()).hexdigest(),
+        "expiration_date": expires_at,
+        "revoked_at": revoked_at,
+    }
+
+
+def upgrade():
+    if not _has_column("expired_tokens", "token"):
+        return
+
+    bind = op.get_bind()
+    op.execute("ALTER TABLE expired_tokens ADD COLUMN IF NOT EXISTS jti VARCHAR(64)")
+    op.execute("ALTER TABLE expired_tokens ADD COLUMN IF NOT EXISTS revoked_at TIMESTAMP WITHOUT TIME ZONE")
+
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, token, expiration_date FROM expired_tokens WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(sa.text(
+            "UPDATE expired_tokens SET jti = :jti, expiration_date = :expiration_date, revoked_at = :revoked_at "
+            "WHERE id = :row_id"
+        ), [_revocation(*row) for row in rows])
+        last_id = rows[-1][0]
+
+    # A token signed out twice has two rows; keep one
+    op.execute("DELETE FROM expired_tokens a USING expired_tokens b WHERE a.jti = b.jti AND a.id < b.id")
+    op.execute("ALTER TABLE expired_tokens ALTER COLUMN jti SET NOT NULL")
+    op.execute("ALTER TABLE expired_tokens ALTER COLUMN revoked_at SET NOT NULL")
+    op.execute("ALTER TABLE expired_tokens ADD CONSTRAINT expired_tokens_jti_key UNIQUE (jti)")
+    op.execute("ALTER TABLE expired_tokens DROP COLUMN token")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_expired_tokens_expiration_date ON expired_tokens (expiration_date)")
+
+
+def downgrade():
+    # The raw tokens are gone, so revocations stored since the upgrade do not survive a downgrade
+    if _has_column("expired_tokens", "token"):
+        return
+    op.execute("DROP INDEX IF EXISTS ix_expired_tokens_expiration_date")
+    op.execute("ALTER TABLE expired_tokens ADD COLUMN token TEXT")
+    op.execute("UPDATE expired_tokens SET token = jti, expiration_date = revoked_at")
+    op.execute("ALTER TABLE expired_tokens ALTER COLUMN token SET NOT NULL")
+    op.execute("ALTER TABLE expired_tokens DROP COLUMN jti")
+    op.execute("ALTER TABLE expired_tokens DROP COLUMN revoked_at")
@@ -0,0 +1,98 @@
+"""partition notifications by day
+
+Revision ID: 7d17f6e750c0
+Revises: fc5a0b1ee387
+Create Date: 2026-10-18 07:58:16.705501
+
+"""
+from datetime import datetime, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d17f6e750c0'
+down_revision = 'fc5a0b1ee387'
+branch_labels = None
+depends_on = None
+
+
+# Same naming as app/services/notification_partition_service.py
+PARTITION_PREFIX = "notifications_p"
+DEFAULT_PARTITION = "notifications_default"
+PARTITION_DAYS_AHEAD = 3
+
+COLUMNS = "id, title, description, navigation, body, image, user_id, type, service, status, is_read, created_at, live_until"
+COLUMN_DEFINITIONS = """
+    id INTEGER NOT NULL DEFAULT nextval('notifications_id_seq'),
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    navigation VARCHAR(255),
+    body TEXT,
+    image VARCHAR(255),
+    user_id INTEGER NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    service VARCHAR(50) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    is_read BOOLEAN,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    live_until TIMESTAMP WITHOUT TIME ZONE
+"""
+
+
+def _relkind():
+    return op.get_bind().execute(sa.text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass('notifications')"
+    )).scalar()
+
+
+def _swap_out_old_table():
+    """Rename the current table out of the way, keeping the id sequence for the new one."""
+    op.execute("LOCK TABLE notifications IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE notifications RENAME TO notifications_old")
+    op.execute("ALTER TABLE notifications_old RENAME CONSTRAINT notifications_pkey TO notifications_old_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_status_live_until")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_created_id")
+
+
+def _copy_from_old_table():
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+    op.execute(f"INSERT INTO notifications ({COLUMNS}) SELECT {COLUMNS} FROM notifications_old")
+    op.execute("DROP TABLE notifications_old CASCADE")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_notifications_status_live_until ON notifications (status, live_until)")
+
+
+def upgrade():
+    """Rebuild a plain notifications table as a daily range-partitioned one.
+
+    A database create_all() built after this change is already partitioned
+    and is left alone. Otherwise the table is locked, copied into a
+    partition per day it holds (plus today, the next days and the default
+    catch-all) and dropped; with 24 hour retention that is about a day of rows.
+    """
+    if _relkind() != "r":
+        return
+
+    _swap_out_old_table()
+    op.execute(f"CREATE TABLE notifications ({COLUMN_DEFINITIONS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)")
+
+    today = datetime.utcnow().date()
+    days = set(op.get_bind().execute(sa.text("SELECT DISTINCT created_at::date FROM notifications_old")).scalars())
+    days.update(today + timedelta(days=offset) for offset in range(PARTITION_DAYS_AHEAD + 1))
+    for day in sorted(days):
+        op.execute(
+            f"CREATE TABLE {PARTITION_PREFIX}{day:%Y%m%d} PARTITION OF notifications "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        )
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF notifications DEFAULT")
+
+    _copy_from_old_table()
+
+
+def downgrade():
+    if _relkind() != "p":
+        return
+
+    _swap_out_old_table()
+    op.execute(f"CREATE TABLE notifications ({COLUMN_DEFINITIONS}, PRIMARY KEY (id))")
+    _copy_from_old_table()
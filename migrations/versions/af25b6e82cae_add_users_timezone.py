@@ -0,0 +1,30 @@
+"""add users.timezone
+
+Revision ID: af25b6e82cae
+Revises: bbd7f5fd400c
+Create Date: 2026-10-18 07:59:35.668765
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.config import Config
+
+
+# revision identifiers, used by Alembic.
+revision = 'af25b6e82cae'
+down_revision = 'bbd7f5fd400c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing users get the default zone, as new ones do
+    op.execute(
+        f"ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone VARCHAR(64) NOT NULL DEFAULT '{Config.DEFAULT_TIMEZONE}'"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_timezone ON users (timezone)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_users_timezone")
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS timezone")
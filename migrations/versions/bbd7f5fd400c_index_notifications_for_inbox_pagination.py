@@ -0,0 +1,25 @@
+"""index notifications for inbox pagination
+
+Revision ID: bbd7f5fd400c
+Revises: 7d17f6e750c0
+Create Date: 2026-10-18 07:58:53.968728
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bbd7f5fd400c'
+down_revision = '7d17f6e750c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination of a user's inbox in GET /notifications/
+    op.execute("CREATE INDEX IF NOT EXISTS ix_notifications_user_created_id ON notifications (user_id, created_at, id)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_created_id")
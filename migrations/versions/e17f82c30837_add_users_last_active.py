@@ -0,0 +1,27 @@
+"""add users.last_active
+
+Revision ID: e17f82c30837
+Revises: 4121404f493f
+Create Date: 2026-10-18 08:00:46.980044
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e17f82c30837'
+down_revision = '4121404f493f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Written behind from Redis by flush_last_active; NULL until a user's next request
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_active TIMESTAMP WITHOUT TIME ZONE")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_last_active ON users (last_active)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_users_last_active")
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS last_active")
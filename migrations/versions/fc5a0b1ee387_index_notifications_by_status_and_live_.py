@@ -0,0 +1,25 @@
+"""index notifications by status and live_until
+
+Revision ID: fc5a0b1ee387
+Revises: 
+Create Date: 2026-10-18 07:58:00.105309
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc5a0b1ee387'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs the SKIP LOCKED claim in send_scheduled_notifications
+    op.execute("CREATE INDEX IF NOT EXISTS ix_notifications_status_live_until ON notifications (status, live_until)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_notifications_status_live_until")